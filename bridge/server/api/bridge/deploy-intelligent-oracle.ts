@@ -85,6 +85,20 @@ export default defineEventHandler(async (event) => {
       body.earliestResolutionDate,
     ];
 
+    // The registry rejects a second oracle for the same market, skip the transaction
+    const existingOracleAddress = await client.readContract({
+      account,
+      address: icRegistryAddress as Address,
+      functionName: "get_address_for_market",
+      args: [deploymentArgs[0]],
+    });
+    if (existingOracleAddress) {
+      return {
+        status: "error",
+        message: `Prediction market ${deploymentArgs[0]} already has an Intelligent Oracle at ${existingOracleAddress}`,
+      };
+    }
+
     const registerContractTransactionHash = await client.writeContract({
       address: icRegistryAddress as Address,
       functionName: "create_new_prediction_market",
@@ -19,8 +19,12 @@ export interface Oracle {
   data_source_domains: string[];
   resolution_urls: string[];
   analysis: Record<string, any>;
+  snapshot_version?: number;
 }
 
+// Largest page of addresses the registry returns per call
+const CONTRACT_ADDRESSES_PAGE_SIZE = 100;
+
 // This store is for:
 // - storing the private key for the account in local storage
 // - providing one account and client to the whole app
@@ -76,13 +80,28 @@ export const useGenlayerStore = defineStore("genlayer", () => {
     loading.value = true;
     try {
       const registryContractAddress = import.meta.env.VITE_CONTRACT_ADDRESS as Address;
-      const contract_addresses: Address[] = await client.value.readContract({
-        account: account.value,
-        address: registryContractAddress,
-        functionName: "get_contract_addresses",
-        args: [],
-      });
-      _oracles.value = await Promise.all(contract_addresses.map((address) => fetchOracle(address)));
+      const contract_count = Number(
+        await client.value.readContract({
+          account: account.value,
+          address: registryContractAddress,
+          functionName: "get_contract_count",
+          args: [],
+        })
+      );
+      // The registry only appends addresses, so only the tail after the cached oracles is fetched
+      const contract_addresses: Address[] =
+        _oracles.value.length <= contract_count ? _oracles.value.map((oracle) => oracle.address) : [];
+      while (contract_addresses.length < contract_count) {
+        const page: Address[] = await client.value.readContract({
+          account: account.value,
+          address: registryContractAddress,
+          functionName: "get_contract_addresses",
+          args: [contract_addresses.length, CONTRACT_ADDRESSES_PAGE_SIZE],
+        });
+        if (page.length === 0) break;
+        contract_addresses.push(...page);
+      }
+      _oracles.value = await Promise.all(contract_addresses.map((address) => refreshOracle(address)));
     } catch (error) {
       console.error("Error refreshing oracles:", error);
     } finally {
@@ -90,6 +109,26 @@ export const useGenlayerStore = defineStore("genlayer", () => {
     }
   }
 
+  // Only fetches the full oracle when its snapshot changed since it was cached
+  async function refreshOracle(address: Address): Promise<Oracle> {
+    const cached = _oracles.value.find((o) => o.address === address);
+    const snapshotVersion = await client.value
+      .readContract({
+        account: account.value,
+        address,
+        functionName: "get_snapshot_version",
+        args: [],
+      })
+      .then((result) => Number(result))
+      .catch(() => undefined);
+    if (cached && snapshotVersion !== undefined && cached.snapshot_version === snapshotVersion) {
+      return cached;
+    }
+    const oracle = await fetchOracle(address);
+    oracle.snapshot_version = snapshotVersion;
+    return oracle;
+  }
+
   async function fetchOracle(address: Address): Promise<Oracle> {
     const oracle = await client.value
       .readContract({
@@ -120,12 +159,24 @@ export const useGenlayerStore = defineStore("genlayer", () => {
 
   async function resolveOracle(address: Address, evidence: string): Promise<Oracle> {
     console.log("resolveOracle", address);
+    const args = evidence ? [evidence] : [];
+    const preflight = await client.value
+      .readContract({
+        account: account.value,
+        address,
+        functionName: "preflight_resolve",
+        args,
+      })
+      .then((result) => Object.fromEntries(result));
+    if (preflight.reason !== "OK") {
+      throw new Error(preflight.message);
+    }
     return await client.value
       .writeContract({
         account: account.value,
         address,
         functionName: "resolve",
-        args: evidence ? [evidence] : [],
+        args,
         value: BigInt(0),
       })
       .then((result) => ({ ...result, address }));
@@ -1,18 +1,261 @@
 # { "Depends": "py-genlayer:test" }
 
+import re
 import json
+import time
+import hashlib
+import functools
+import unicodedata
 from enum import Enum
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
 from genlayer import *
 
 
+class TraceLevel(Enum):
+    OFF = 0
+    INFO = 1  # Sizes, timings, hashes and outcomes
+    DEBUG = 2  # Also full webpages and LLM outputs
+
+
+# Tracing is off by default, raise it before deploying to debug resolutions
+TRACE_LEVEL = TraceLevel.OFF
+
+# Upper bound on the per-source analyses kept between resolve attempts
+MAX_CACHED_SOURCE_ANALYSES = 32
+
+# How long the per-source results of an interrupted attempt can be resumed
+MAX_RESOLUTION_PROGRESS_AGE = timedelta(hours=1)
+
+# How long a completed resolve attempt blocks other resolves of the same market
+RESOLUTION_COOLDOWN = timedelta(minutes=5)
+
+# Most evidence URLs a single resolve_with_evidence call can have evaluated
+MAX_EVIDENCE_URLS = 5
+
+# Furthest a next resolution check hint can be scheduled, whatever the sources expect
+MAX_NEXT_RESOLUTION_CHECK_DELAY = timedelta(days=7)
+
+# Default character budget for a single source in a prompt (~10k tokens)
+DEFAULT_MAX_SOURCE_CHARS = 40000
+# Repeated lines at least this long are treated as page boilerplate
+MIN_REPEATED_LINE_CHARS = 20
+# Longer lines are never treated as boilerplate
+MAX_BOILERPLATE_LINE_CHARS = 120
+# Short lines that are only page chrome: a link or button label on its own, or a
+# cookie banner or copyright notice. Match whole words, so news lines such as
+# "Arsenal sign in-form striker" are kept
+BOILERPLATE_LINE_PATTERN = re.compile(
+    r"^\W*(?:sign in|sign up|log in|log out|register|subscribe|newsletter|"
+    r"privacy(?: policy| settings)?|cookie (?:policy|settings)|"
+    r"(?:accept|reject)(?: all)?(?: cookies)?|terms(?: of (?:use|service))?|"
+    r"skip to (?:main )?content|all rights reserved)\W*$|"
+    r"^\W*(?:\u00a9|copyright\b|all rights reserved\b|we use cookies\b|"
+    r"this (?:web)?site uses cookies\b|subscribe to our newsletter\b)",
+    re.IGNORECASE,
+)
+
+JSON_DECODER = json.JSONDecoder()
+
+# Lines passed into the prompt after an `anchor:` extraction hint matches
+EXTRACTION_HINT_ANCHOR_LINES = 60
+# Lines kept around every match of a `keyword:` extraction hint
+EXTRACTION_HINT_CONTEXT_LINES = 5
+
+SOURCE_ANALYSIS_INSTRUCTIONS = """
+### **Your Task:**
+1. **Analyze the Inputs:**
+- Carefully read and interpret the user-defined rules.
+- Parse the HTML content to extract meaningful information relevant to the rules.
+- Determine if the source pertains to the event that is being predicted.
+- Determine if the event has occurred yet.
+- If it has not, estimate from the source when it is expected to have occurred.
+
+2. **Provide Reasoning:**
+- Write a clear, self-contained reasoning for the outcome.
+- Reference specific parts of the rules and the extracted data that support your decision.
+- Ensure that someone reading the reasoning can understand it without needing additional information.
+
+3. **Determine The Outcome:**
+- Based on your analysis, decide which potential outcome is correct.
+- If an outcome can be determined, but the outcome is not in the list of potential outcomes, the outcome should be `ERROR`.
+- If the information is insufficient or inconclusive, or the event has not occurred yet, and you cannot confidently determine an outcome based on this source, the outcome should be `UNDETERMINED`.
+
+
+
+
+### **Output Format:**
+
+Provide your response in **valid JSON** format with the following structure:
+
+```json
+{
+    "valid_source": "true | false",
+    "event_has_occurred": "true | false",
+    "expected_completion": "ISO 8601 date and time at which the event is expected to have occurred according to the source, empty if it has occurred or the source does not say",
+    "reasoning": "Your detailed reasoning here",
+    "outcome": "Chosen outcome from the potential outcomes list, `UNDETERMINED` if no outcome can be determined based on this source, `ERROR` if the outcome is not in the potential outcomes list"
+}
+```
+
+### **Constraints and Considerations:**
+
+- **Accuracy:** Base your decision strictly on the provided inputs.
+- **Objectivity:** Remain neutral and unbiased.
+- **Clarity:** Make sure your reasoning is easy to understand.
+- **Validity:** Ensure the JSON output is properly formatted and free of errors. Do not include trailing commas.
+"""
+
+AGGREGATION_INSTRUCTIONS = """
+### **Your Task:**
+1. **Analyze the Inputs:**
+- Carefully read and interpret the user-defined rules.
+- Take into account all the processed data form the sources.
+- Consider the resolution date in your analysis to ensure timeliness of the data.
+
+2. **Determine The Outcome:**
+- The output should be determined from the processed data form the resolution sources.
+- Based on your analysis, decide which potential outcome is correct.
+- If an outcome can be determined, but the outcome is not in the list of potential outcomes, the outcome should be `ERROR`.
+- If the information is insufficient or inconclusive, and you cannot confidently determine an outcome, the outcome should be `UNDETERMINED`.
+- Your response should reflect a coherent summary outcome from the previous analysis.
+- If multiple sources contradict each other, refer to the rules to determine how to resolve the contradiction.
+- If the rules do not provide a clear resolution, the outcome should be `ERROR`.
+
+### **Output Format:**
+
+Provide your response in **valid JSON** format with the following structure:
+
+```json
+{
+"relevant_sources": "List of URLs that are relevant to the outcome",
+"reasoning": "Your detailed reasoning here",
+"outcome": "Chosen outcome from the potential outcomes list, `UNDETERMINED` if undetermined, `ERROR` if the outcome is not in the potential outcomes list"
+}
+```
+
+### **Constraints and Considerations:**
+
+- **Accuracy:** Base your decision strictly on the provided inputs.
+- **Objectivity:** Remain neutral and unbiased.
+- **Clarity:** Make sure your reason is easy to understand.
+- **Validity:** Ensure the JSON output is properly formatted and free of errors. Do not include trailing commas.
+"""
+
+BATCHED_ANALYSIS_INSTRUCTIONS = """
+### **Your Task:**
+1. **Analyze Each Source Independently:**
+- Carefully read and interpret the user-defined rules.
+- Parse the webpage content of the source to extract meaningful information relevant to the rules.
+- Determine if the source pertains to the event that is being predicted.
+- Determine if the event has occurred yet according to the source.
+- Decide which potential outcome the source supports, `UNDETERMINED` if the source is insufficient or inconclusive, or `ERROR` if it supports an outcome that is not in the list of potential outcomes.
+
+2. **Determine The Final Outcome:**
+- The final outcome should be determined from your per-source analysis.
+- If multiple sources contradict each other, refer to the rules to determine how to resolve the contradiction.
+- If the rules do not provide a clear resolution, the outcome should be `ERROR`.
+- If the information is insufficient or inconclusive, and you cannot confidently determine an outcome, the outcome should be `UNDETERMINED`.
+
+3. **Provide Reasoning:**
+- Write a clear, self-contained reasoning for each source and for the final outcome.
+- Reference specific parts of the rules and the extracted data that support your decision.
+
+
+
+
+### **Output Format:**
+
+Provide your response in **valid JSON** format with the following structure:
+
+```json
+{
+    "sources": [
+        {
+            "source_url": "The URL of the source",
+            "valid_source": "true | false",
+            "event_has_occurred": "true | false",
+            "reasoning": "Your detailed reasoning for this source",
+            "outcome": "Chosen outcome from the potential outcomes list, `UNDETERMINED` or `ERROR`"
+        }
+    ],
+    "relevant_sources": "List of URLs that are relevant to the outcome",
+    "reasoning": "Your detailed reasoning for the final outcome",
+    "outcome": "Chosen outcome from the potential outcomes list, `UNDETERMINED` if undetermined, `ERROR` if the outcome is not in the potential outcomes list"
+}
+```
+
+The `sources` list must contain exactly one entry per source, in the same order as the inputs.
+
+### **Constraints and Considerations:**
+
+- **Accuracy:** Base your decision strictly on the provided inputs.
+- **Objectivity:** Remain neutral and unbiased.
+- **Clarity:** Make sure your reasoning is easy to understand.
+- **Validity:** Ensure the JSON output is properly formatted and free of errors. Do not include trailing commas.
+"""
+
+FACT_EXTRACTION_INSTRUCTIONS = """
+### **Your Task:**
+- List the relevant facts as short plain-text lines, quoting names, scores, dates and results exactly as they appear.
+- Do not decide the outcome of the market.
+- If this part contains nothing relevant, respond with `NONE` only.
+"""
+
+
 class Status(Enum):
     ACTIVE = "Active"
     RESOLVED = "Resolved"
     ERROR = "Error"
 
 
+# Statuses are stored as their index in this tuple, in a single byte
+STORED_STATUSES = (Status.ACTIVE, Status.RESOLVED, Status.ERROR)
+
+# Fields returned by get_summary, enough for a list of markets
+SUMMARY_FIELDS = (
+    "prediction_market_id",
+    "title",
+    "status",
+    "outcome",
+    "earliest_resolution_date",
+)
+
+
+class ResolveRejection(Enum):
+    # The name is the machine-readable reason, the value is the error message
+    ALREADY_RESOLVED = "Cannot resolve an already resolved oracle."
+    TOO_EARLY = "Cannot resolve before the earliest resolution date."
+    UNEXPECTED_EVIDENCE_URL = "An evidence URL was provided but the oracle is configured to use resolution URLs already provided."
+    MISSING_EVIDENCE_URL = "No evidence URL provided and the oracle is not configured to use resolution URLs."
+    TOO_MANY_EVIDENCE_URLS = (
+        f"Cannot resolve with more than {MAX_EVIDENCE_URLS} evidence URLs at once."
+    )
+    RESOLUTION_COOLDOWN = (
+        "A resolve attempt completed recently, wait for the resolution cooldown to end."
+    )
+    NEXT_CHECK_PENDING = "Cannot resolve before the next resolution check time."
+    EVIDENCE_DOMAIN_NOT_ALLOWED = (
+        "The evidence URL does not match any of the data source domains."
+    )
+
+
+class EvaluationMode(Enum):
+    PER_SOURCE = "per_source"  # One consensus round per source, then aggregation
+    BATCHED = "batched"  # All sources in a single prompt and consensus round
+    CHUNKED = "chunked"  # Like PER_SOURCE, but oversized pages are map-reduced
+
+
+class ConsensusMode(Enum):
+    COMPARATIVE = "comparative"  # Validators compare full results with an LLM
+    STRICT = "strict"  # Validators compare normalized outcomes with strict equality
+
+
+class LLMOutputError(ValueError):
+    # An LLM output without a usable JSON object
+    pass
+
+
 @gl.contract
 class IntelligentOracle:
     # Declare persistent storage fields
@@ -20,14 +263,33 @@ class IntelligentOracle:
     title: str
     description: str
     potential_outcomes: DynArray[str]
+    outcome_index: TreeMap[str, str]  # Normalized outcomes and aliases to the outcome
     rules: DynArray[str]
     data_source_domains: DynArray[str]
+    domain_index: TreeMap[str, bool]  # Allowed domains keyed by reversed labels
     resolution_urls: DynArray[str]
     earliest_resolution_date: str  # Store as ISO format string
-    status: str  # Store as string since Enum isn't supported
-    analysis: str  # Store analysis results
+    status: u8  # Index in STORED_STATUSES since Enum isn't supported
+    analysis_summary: str  # JSON analysis results without any reasoning
+    reasoning: str  # JSON overall and per-source reasoning, kept apart from the summary
     outcome: str
     creator: Address
+    evaluation_mode: str  # Store as string since Enum isn't supported
+    source_analysis_cache: str  # JSON list of per-source analyses, least recent first
+    max_source_chars: u32  # Character budget per source in a prompt, 0 for no limit
+    extraction_hints: DynArray[str]  # One per resolution URL, empty string for no hint
+    structured_rules: DynArray[str]  # One JSON rule per resolution URL, empty for LLM
+    consensus_mode: str  # Store as string since Enum isn't supported
+    quorum: u32  # Agreeing sources that settle the outcome early, 0 to evaluate all
+    prompt_context: str  # Market inputs shared by all prompts, rendered once
+    snapshot: str  # JSON get_dict result, rebuilt whenever one of its fields changes
+    snapshot_version: u32  # Incremented on every snapshot rebuild
+    resolution_attempt: u32  # Id of the current or last resolution attempt
+    resolution_progress: str  # JSON per-source results of an unfinished attempt
+    resolution_attempt_started_at: str  # ISO date-time the current attempt started
+    next_resolution_check: str  # ISO date-time before which a resolve is premature
+    resolution_cooldown_until: str  # ISO date-time until which resolves are rejected
+    enforce_next_resolution_check: bool  # Reject resolves before next_resolution_check
 
     def __init__(
         self,
@@ -39,6 +301,14 @@ class IntelligentOracle:
         data_source_domains: list[str],
         resolution_urls: list[str],
         earliest_resolution_date: str,
+        evaluation_mode: str = EvaluationMode.PER_SOURCE.value,
+        max_source_chars: int = DEFAULT_MAX_SOURCE_CHARS,
+        extraction_hints: list[str] = [],
+        structured_rules: list[str] = [],
+        consensus_mode: str = ConsensusMode.COMPARATIVE.value,
+        quorum: int = 0,
+        enforce_next_resolution_check: bool = False,
+        outcome_aliases: dict[str, list[str]] = {},
     ):
         if (
             not prediction_market_id
@@ -64,6 +334,33 @@ class IntelligentOracle:
         if len(potential_outcomes) != len(set(potential_outcomes)):
             raise ValueError("Potential outcomes must be unique.")
 
+        if evaluation_mode not in [mode.value for mode in EvaluationMode]:
+            raise ValueError("Invalid evaluation mode.")
+
+        if consensus_mode not in [mode.value for mode in ConsensusMode]:
+            raise ValueError("Invalid consensus mode.")
+
+        if quorum < 0 or (resolution_urls and quorum > len(resolution_urls)):
+            raise ValueError("The quorum must be between 0 and the number of sources.")
+
+        if quorum > 0 and evaluation_mode == EvaluationMode.BATCHED.value:
+            raise ValueError("A quorum cannot be used in batched evaluation mode.")
+
+        if max_source_chars < 0:
+            raise ValueError("The source character budget cannot be negative.")
+
+        if extraction_hints and len(extraction_hints) != len(resolution_urls):
+            raise ValueError("Provide exactly one extraction hint per resolution URL.")
+
+        for hint in extraction_hints:
+            _parse_extraction_hint(hint.strip())
+
+        if structured_rules and len(structured_rules) != len(resolution_urls):
+            raise ValueError("Provide exactly one structured rule per resolution URL.")
+
+        for rule in structured_rules:
+            _parse_structured_rule(rule, potential_outcomes)
+
         self.prediction_market_id = prediction_market_id
         self.title = title
         self.description = description
@@ -71,101 +368,343 @@ class IntelligentOracle:
         for outcome in potential_outcomes:
             self.potential_outcomes.append(outcome.strip())
 
+        outcome_index = _build_outcome_index(
+            list(self.potential_outcomes), outcome_aliases
+        )
+        for key, outcome in outcome_index.items():
+            self.outcome_index[key] = outcome
+
         for rule in rules:
             self.rules.append(rule)
 
         for datasource in data_source_domains:
-            self.data_source_domains.append(
-                datasource.strip()
-                .lower()
-                .replace("http://", "")
-                .replace("https://", "")
-                .replace("www.", "")
-            )
+            domain = _normalize_domain(datasource)
+            if not domain:
+                raise ValueError(f"Invalid data source domain: {datasource!r}")
+            self.data_source_domains.append(domain)
+            self.domain_index[_domain_index_key(domain)] = True
 
         for url in resolution_urls:
             self.resolution_urls.append(url.strip())
 
+        for hint in extraction_hints:
+            self.extraction_hints.append(hint.strip())
+
+        for rule in structured_rules:
+            self.structured_rules.append(
+                json.dumps(_parse_structured_rule(rule, potential_outcomes))
+                if rule.strip()
+                else ""
+            )
+
         self.earliest_resolution_date = earliest_resolution_date
-        self.status = Status.ACTIVE.value
+        self.prompt_context = _render_prompt_context(
+            title,
+            description,
+            list(self.potential_outcomes),
+            list(self.rules),
+            earliest_resolution_date,
+        )
+        self._set_status(Status.ACTIVE)
+        self.evaluation_mode = evaluation_mode
+        self.consensus_mode = consensus_mode
+        self.quorum = quorum
+        self.source_analysis_cache = "[]"
+        self.resolution_attempt = 0
+        self.resolution_progress = ""
+        self.resolution_attempt_started_at = ""
+        self.next_resolution_check = ""
+        self.resolution_cooldown_until = ""
+        self.enforce_next_resolution_check = enforce_next_resolution_check
+        self.max_source_chars = max_source_chars
 
         self.outcome = ""
         self.creator = gl.message.sender_account
+        self._build_snapshot()
 
     @gl.public.view
     def _check_evidence_domain(self, evidence: str) -> bool:
+        """
+        Accepts the evidence when its host is an allowed domain or one of its subdomains.
+        Looks up one index key per label of the host, whatever the number of allowed domains.
+        """
         try:
-            parsed_url = urlparse(evidence)
-            evidence_domain = parsed_url.netloc.lower().replace("www.", "")
-            return evidence_domain in self.data_source_domains
+            # Evidence must be a full URL, while allowed domains may omit the scheme
+            if not urlparse(evidence).netloc:
+                return False
+            evidence_domain = _normalize_domain(evidence)
         except Exception:
             return False
+        if not evidence_domain:
+            return False
+        return any(
+            key in self.domain_index for key in _domain_lookup_keys(evidence_domain)
+        )
 
-    @gl.public.write
-    def resolve(self, evidence_url: str = "") -> None:
-        if self.status == Status.RESOLVED.value:
-            raise ValueError("Cannot resolve an already resolved oracle.")
+    def _check_resolve(self, evidence_urls: list[str]) -> ResolveRejection | None:
+        """
+        Runs the deterministic checks of `resolve` and `resolve_with_evidence`,
+        shared with their preflight views.
+        """
+        if self._status() == Status.RESOLVED:
+            return ResolveRejection.ALREADY_RESOLVED
 
         current_time = datetime.now().astimezone().date()
         earliest_time = datetime.fromisoformat(self.earliest_resolution_date).date()
         if current_time < earliest_time:
-            raise ValueError("Cannot resolve before the earliest resolution date.")
+            return ResolveRejection.TOO_EARLY
 
-        if len(self.resolution_urls) > 0 and evidence_url:
-            raise ValueError(
-                "An evidence URL was provided but the oracle is configured to use resolution URLs already provided."
-            )
+        if self._in_resolution_cooldown():
+            return ResolveRejection.RESOLUTION_COOLDOWN
 
-        if len(self.resolution_urls) == 0 and not evidence_url:
-            raise ValueError(
-                "No evidence URL provided and the oracle is not configured to use resolution URLs."
-            )
+        if (
+            self.enforce_next_resolution_check
+            and self.next_resolution_check
+            and datetime.now(timezone.utc)
+            < datetime.fromisoformat(self.next_resolution_check)
+        ):
+            return ResolveRejection.NEXT_CHECK_PENDING
 
-        if evidence_url:
-            is_valid = self._check_evidence_domain(evidence_url)
-            if not is_valid:
-                raise ValueError(
-                    "The evidence URL does not match any of the data source domains."
-                )
+        rejection = _evidence_rejection(evidence_urls, len(self.resolution_urls) > 0)
+        if rejection is not None:
+            return rejection
+
+        for evidence_url in evidence_urls:
+            if not self._check_evidence_domain(evidence_url):
+                return ResolveRejection.EVIDENCE_DOMAIN_NOT_ALLOWED
+
+        return None
+
+    def _in_resolution_cooldown(self) -> bool:
+        return bool(self.resolution_cooldown_until) and datetime.now(
+            timezone.utc
+        ) < datetime.fromisoformat(self.resolution_cooldown_until)
+
+    def _preflight(self, evidence_urls: list[str]) -> dict[str, str]:
+        rejection = self._check_resolve(evidence_urls)
+        if rejection is None:
+            return {"reason": "OK", "message": ""}
+        return {"reason": rejection.name, "message": rejection.value}
+
+    @gl.public.view
+    def preflight_resolve(self, evidence_url: str = "") -> dict[str, str]:
+        """
+        Tells whether `resolve` would pass its deterministic checks, without sending a transaction.
+        `reason` is "OK" or the name of the ResolveRejection.
+        """
+        return self._preflight(_evidence_list(evidence_url))
+
+    @gl.public.view
+    def preflight_resolve_with_evidence(
+        self, evidence_urls: list[str]
+    ) -> dict[str, str]:
+        """
+        Same as `preflight_resolve`, for `resolve_with_evidence`.
+        """
+        return self._preflight(_evidence_list(*evidence_urls))
+
+    @gl.public.write
+    def resolve(self, evidence_url: str = "") -> None:
+        self._resolve(_evidence_list(evidence_url))
+
+    @gl.public.write
+    def resolve_with_evidence(self, evidence_urls: list[str]) -> None:
+        """
+        Resolves a domain-based market from up to MAX_EVIDENCE_URLS evidence URLs at once.
+        All of them must be on the allowed domains, and they are evaluated together like
+        resolution URLs.
+        """
+        self._resolve(_evidence_list(*evidence_urls))
+
+    def _resolve(self, evidence_urls: list[str]) -> None:
+        rejection = self._check_resolve(evidence_urls)
+        if rejection is not None:
+            raise ValueError(rejection.value)
 
-        analyzed_outputs = []
         resources_to_check = (
-            self.resolution_urls if len(self.resolution_urls) > 0 else [evidence_url]
+            list(self.resolution_urls)
+            if len(self.resolution_urls) > 0
+            else evidence_urls
         )
-
-        title = self.title
-        description = self.description
+        # Copied out of storage once and passed down the whole resolution
         potential_outcomes = list(self.potential_outcomes)
-        rules = list(self.rules)
-        earliest_resolution_date = self.earliest_resolution_date
+        outcome_index = dict(self.outcome_index)
 
-        for resource_url in resources_to_check:
+        # Continue a recent unfinished attempt, otherwise start a new one
+        now = datetime.now(timezone.utc)
+        if (
+            self.resolution_progress
+            and now
+            >= datetime.fromisoformat(self.resolution_attempt_started_at)
+            + MAX_RESOLUTION_PROGRESS_AGE
+        ):
+            _trace("resolution_progress_expired", attempt=self.resolution_attempt)
+            self.resolution_progress = ""
+        if not self.resolution_progress:
+            self.resolution_attempt += 1
+            self.resolution_attempt_started_at = now.isoformat()
+            self._save_resolution_progress([], "")
 
-            def evaluate_single_source() -> str:
-                resource_web_data = gl.get_webpage(resource_url, mode="text")
-                print(resource_web_data)
+        try:
+            if self.evaluation_mode == EvaluationMode.BATCHED.value:
+                result_dict = self._evaluate_sources_batched(
+                    resources_to_check, potential_outcomes, outcome_index
+                )
+            else:
+                result_dict = self._evaluate_sources_individually(
+                    resources_to_check, potential_outcomes, outcome_index
+                )
+        except LLMOutputError as error:
+            # Raising would revert the per-source results saved so far, so keep them
+            # for the next attempt unless there is nothing to keep
+            progress = json.loads(self.resolution_progress)
+            if not progress["sources"]:
+                raise
+            self._save_resolution_progress(progress["sources"], str(error))
+            _trace(
+                "resolution_interrupted",
+                attempt=self.resolution_attempt,
+                completed_sources=len(progress["sources"]),
+                error=str(error),
+            )
+            # Record the interruption in the analysis, where callers look for the result
+            self._set_analysis(
+                {
+                    "relevant_sources": [],
+                    "reasoning": f"Resolution attempt {self.resolution_attempt} was "
+                    f"interrupted after {len(progress['sources'])} source(s): {error}. "
+                    "Resolve again to continue with the remaining sources.",
+                    "outcome": "UNDETERMINED",
+                }
+            )
+            self._refresh_snapshot()
+            return
 
-                task = f"""
-You are an AI Validator tasked with resolving a prediction market. 
-Your goal is to determine the correct outcome based on the user-defined rules, 
-the provided webpage HTML content, the resolution date, and the list of potential outcomes.
+        self.resolution_progress = ""
+        result_dict["outcome"] = _canonical_outcome(
+            result_dict["outcome"], outcome_index
+        )
+        self._set_analysis(result_dict)
+        _trace("resolution_outcome", outcome=result_dict["outcome"])
 
-### Inputs
-<title>
-{title}
-</title>
+        # Transactions are atomic, so nothing can mark a resolution as running. A
+        # completed attempt instead turns away the duplicate resolves queued behind it
+        # for a while, instead of letting each rerun the whole pipeline
+        self.resolution_cooldown_until = (
+            datetime.now(timezone.utc) + RESOLUTION_COOLDOWN
+        ).isoformat()
 
-<description>
-{description}
-</description>
+        if result_dict["outcome"] == "UNDETERMINED":
+            _trace("next_resolution_check", at=self.next_resolution_check)
+        else:
+            self.next_resolution_check = ""
+            if (
+                result_dict["outcome"] == "ERROR"
+                or result_dict["outcome"] not in potential_outcomes
+            ):
+                self._set_status(Status.ERROR)
+            else:
+                self.outcome = result_dict["outcome"]
+                self._set_status(Status.RESOLVED)
+
+        self._refresh_snapshot()
+
+    def _evaluate_sources_individually(
+        self,
+        resources_to_check: list[str],
+        potential_outcomes: list[str],
+        outcome_index: dict[str, str],
+    ) -> dict:
+        # Sources already settled by an interrupted attempt are not evaluated again.
+        # Undecided verdicts are, since the event may have occurred in the meantime
+        completed_sources = [
+            entry
+            for entry in json.loads(self.resolution_progress)["sources"]
+            if entry["source_url"] in resources_to_check
+            and entry["result"].get("outcome") in potential_outcomes
+        ]
+        analyzed_outputs = [
+            (entry["source_url"], entry["result"]) for entry in completed_sources
+        ]
+        if completed_sources:
+            _trace(
+                "resolution_resumed",
+                attempt=self.resolution_attempt,
+                completed_sources=len(completed_sources),
+            )
 
-<potential_outcomes>
-{potential_outcomes}
-</potential_outcomes>
+        prompt_context = self.prompt_context
+        max_source_chars = self.max_source_chars
+        extraction_hints = dict(zip(self.resolution_urls, self.extraction_hints))
+        # In chunked mode the budget sets the chunk size instead of truncating the page
+        chunked = self.evaluation_mode == EvaluationMode.CHUNKED.value
+        structured_rules = dict(zip(self.resolution_urls, self.structured_rules))
+        strict = self.consensus_mode == ConsensusMode.STRICT.value
+        cached_analyses = {
+            entry["source_url"]: entry
+            for entry in json.loads(self.source_analysis_cache)
+        }
 
-<rules>
-{rules}
-</rules>
+        def evaluate_single_source(resource_url: str) -> str:
+            cached_analysis = cached_analyses.get(resource_url)
+            started = time.monotonic()
+            resource_web_data, compaction = _compact_webpage(
+                _apply_extraction_hint(
+                    gl.get_webpage(resource_url, mode="text"),
+                    extraction_hints.get(resource_url, ""),
+                ),
+                0 if chunked else max_source_chars,
+            )
+
+            # Reuse the last verdict for this source if its content has not changed
+            content_hash = _content_hash(resource_web_data)
+            _trace(
+                "source_fetched",
+                source_url=resource_url,
+                seconds=round(time.monotonic() - started, 3),
+                content_hash=content_hash,
+                **compaction,
+            )
+            _trace(
+                "source_content",
+                TraceLevel.DEBUG,
+                source_url=resource_url,
+                content=resource_web_data,
+            )
+            if (
+                cached_analysis is not None
+                and cached_analysis["content_hash"] == content_hash
+            ):
+                _trace("source_cache_hit", source_url=resource_url)
+                return json.dumps(
+                    {**cached_analysis["result"], "content_hash": content_hash}
+                )
+
+            if chunked and 0 < max_source_chars < len(resource_web_data):
+                started = time.monotonic()
+                resource_web_data = _extract_relevant_facts(
+                    resource_web_data, max_source_chars, prompt_context
+                )
+                _trace(
+                    "source_facts_extracted",
+                    source_url=resource_url,
+                    seconds=round(time.monotonic() - started, 3),
+                    facts_chars=len(resource_web_data),
+                )
+                _trace(
+                    "source_facts",
+                    TraceLevel.DEBUG,
+                    source_url=resource_url,
+                    content=resource_web_data,
+                )
+
+            task = f"""
+You are an AI Validator tasked with resolving a prediction market.
+Your goal is to determine the correct outcome based on the user-defined rules,
+the provided webpage HTML content, the resolution date, and the list of potential outcomes.
+
+### Inputs
+{prompt_context}
 
 <source_url>
 {resource_url}
@@ -179,195 +718,1114 @@ the provided webpage HTML content, the resolution date, and the list of potentia
 {datetime.now().astimezone()}
 </current_date>
 
-<earliest_resolution_date>
-{earliest_resolution_date}
-</earliest_resolution_date>
+{SOURCE_ANALYSIS_INSTRUCTIONS}"""
+            started = time.monotonic()
+            result = gl.exec_prompt(task)
+            _trace(
+                "source_prompted",
+                source_url=resource_url,
+                seconds=round(time.monotonic() - started, 3),
+                prompt_chars=len(task),
+                output_chars=len(result),
+            )
+            _trace(
+                "source_output",
+                TraceLevel.DEBUG,
+                source_url=resource_url,
+                output=result,
+            )
+            result_dict = _parse_json_dict(result)
+            result_dict["content_hash"] = content_hash
+            return json.dumps(result_dict)
+
+        def evaluate_single_source_verdict(resource_url: str) -> str:
+            return json.dumps(
+                _normalize_verdict(
+                    _parse_json_dict(evaluate_single_source(resource_url)),
+                    outcome_index,
+                ),
+                sort_keys=True,
+            )
 
+        def start_evaluation(resource_url: str):
+            if structured_rules.get(resource_url):
+                return self._start_structured_evaluation(
+                    resource_url, structured_rules[resource_url]
+                )
 
+            if strict:
+                return gl.eq_principle_strict_eq.lazy(
+                    functools.partial(evaluate_single_source_verdict, resource_url)
+                )
 
+            return gl.eq_principle_prompt_comparative.lazy(
+                functools.partial(evaluate_single_source, resource_url),
+                principle="`outcome` field must be exactly the same. All other fields must be similar, except `content_hash` which may differ",
+            )
 
-### **Your Task:**
-1. **Analyze the Inputs:**
-- Carefully read and interpret the user-defined rules.
-- Parse the HTML content to extract meaningful information relevant to the rules.
-- Determine if the source pertains to the event that is being predicted.
-- Determine if the event has occurred yet.
+        # Without a quorum every source is evaluated in a single wave. With a quorum
+        # each wave only evaluates as many sources as are still needed to reach it
+        quorum = self.quorum
+        completed_urls = {resource_url for resource_url, _ in analyzed_outputs}
+        remaining_sources = [
+            resource_url
+            for resource_url in resources_to_check
+            if resource_url not in completed_urls
+        ]
+        wave_size = len(remaining_sources)
+        while True:
+            if quorum > 0:
+                leading_outcome, votes = _leading_outcome(
+                    analyzed_outputs, potential_outcomes
+                )
+                if votes >= quorum:
+                    analysis = _analysis_from_sources(analyzed_outputs, leading_outcome)
+                    analysis["skipped_sources"] = remaining_sources
+                    return analysis
+                wave_size = quorum - votes
+
+            if not remaining_sources:
+                break
+            wave = remaining_sources[:wave_size]
+            remaining_sources = remaining_sources[wave_size:]
+
+            # Start every round of the wave up front so that the pages are fetched
+            # and analyzed concurrently, then collect the results in source order
+            pending_results = [start_evaluation(resource_url) for resource_url in wave]
+
+            for resource_url, pending_result in zip(wave, pending_results):
+                result_dict = _parse_json_dict(pending_result.get())
+                result_dict["outcome"] = _canonical_outcome(
+                    result_dict.get("outcome", ""), outcome_index
+                )
+                result_dict.setdefault("reasoning", _describe_verdict(result_dict))
+                content_hash = result_dict.pop("content_hash", "")
+                if content_hash:
+                    self._cache_source_analysis(resource_url, content_hash, result_dict)
+                analyzed_outputs.append((resource_url, result_dict))
+                completed_sources.append(
+                    {
+                        "source_url": resource_url,
+                        "content_hash": content_hash,
+                        "result": result_dict,
+                    }
+                )
+                self._save_resolution_progress(completed_sources, "")
+                _trace(
+                    "source_verdict",
+                    source_url=resource_url,
+                    outcome=result_dict.get("outcome"),
+                    content_hash=content_hash,
+                )
 
-2. **Provide Reasoning:**
-- Write a clear, self-contained reasoning for the outcome.
-- Reference specific parts of the rules and the extracted data that support your decision.
-- Ensure that someone reading the reasoning can understand it without needing additional information.
+        # Kept only if the market ends up undetermined
+        self.next_resolution_check = _next_resolution_check(
+            analyzed_outputs, datetime.now(timezone.utc)
+        )
+        return self._aggregate_source_analyses(
+            analyzed_outputs, potential_outcomes, outcome_index
+        )
 
-3. **Determine The Outcome:**
-- Based on your analysis, decide which potential outcome is correct.
-- If an outcome can be determined, but the outcome is not in the list of potential outcomes, the outcome should be `ERROR`.
-- If the information is insufficient or inconclusive, or the event has not occurred yet, and you cannot confidently determine an outcome based on this source, the outcome should be `UNDETERMINED`.
+    def _aggregate_source_analyses(
+        self,
+        analyzed_outputs: list[tuple[str, dict]],
+        potential_outcomes: list[str],
+        outcome_index: dict[str, str],
+    ) -> dict:
+        prompt_context = self.prompt_context
 
+        # Skip the aggregation round when there is nothing left to aggregate
+        agreed_outcome = _agreed_outcome(analyzed_outputs, potential_outcomes)
+        if agreed_outcome is not None:
+            return _analysis_from_sources(analyzed_outputs, agreed_outcome)
 
+        def evaluate_all_sources() -> str:
+            task = f"""
+You are an AI Validator tasked with resolving a prediction market Oracle. Your goal is to determine
+the correct outcome based on processed data from all of the individial data sources. Here are your inputs
 
+### Inputs
+{prompt_context}
 
-### **Output Format:**
+<processed_data>
+{analyzed_outputs}
+</processed_data>
 
-Provide your response in **valid JSON** format with the following structure:
+<current_date>
+{datetime.now().astimezone()}
+</current_date>
 
-```json
-{{
-    "valid_source": "true | false",
-    "event_has_occurred": "true | false",
-    "reasoning": "Your detailed reasoning here",
-    "outcome": "Chosen outcome from the potential outcomes list, `UNDETERMINED` if no outcome can be determined based on this source, `ERROR` if the outcome is not in the potential outcomes list"                
-}}
-```
+{AGGREGATION_INSTRUCTIONS}"""
 
-### **Constraints and Considerations:**
+            started = time.monotonic()
+            result = gl.exec_prompt(task)
+            _trace(
+                "sources_aggregated",
+                seconds=round(time.monotonic() - started, 3),
+                prompt_chars=len(task),
+                output_chars=len(result),
+            )
+            _trace("aggregation_output", TraceLevel.DEBUG, output=result)
+            return result
 
-- **Accuracy:** Base your decision strictly on the provided inputs.
-- **Objectivity:** Remain neutral and unbiased.
-- **Clarity:** Make sure your reasoning is easy to understand.
-- **Validity:** Ensure the JSON output is properly formatted and free of errors. Do not include trailing commas.
-                """
-                result = gl.exec_prompt(task)
-                print(result)
-                return result
+        if self.consensus_mode == ConsensusMode.STRICT.value:
 
-            result = gl.eq_principle_prompt_comparative(
-                evaluate_single_source,
-                principle="`outcome` field must be exactly the same. All other fields must be similar",
+            def evaluate_all_sources_verdict() -> str:
+                return json.dumps(
+                    _normalize_verdict(
+                        _parse_json_dict(evaluate_all_sources()), outcome_index
+                    ),
+                    sort_keys=True,
+                )
+
+            result = gl.eq_principle_strict_eq(evaluate_all_sources_verdict)
+            return _analysis_from_sources(
+                analyzed_outputs, _parse_json_dict(result)["outcome"]
             )
 
-            result_dict = _parse_json_dict(result)
-            analyzed_outputs.append((resource_url, result_dict))
+        result = gl.eq_principle_prompt_comparative(
+            evaluate_all_sources,
+            principle="`outcome` field must be exactly the same. All other fields must be similar",
+        )
+
+        return _parse_json_dict(result)
+
+    def _start_structured_evaluation(self, resource_url: str, structured_rule: str):
+        """
+        Starts a consensus round that resolves the source with its structured rule.
+        No prompt is executed, so validators can compare results with strict equality.
+        """
+
+        def evaluate_structured_source() -> str:
+            resource_web_data = gl.get_webpage(resource_url, mode="text")
+            return json.dumps(
+                _apply_structured_rule(resource_web_data, json.loads(structured_rule)),
+                sort_keys=True,
+            )
+
+        return gl.eq_principle_strict_eq.lazy(evaluate_structured_source)
+
+    def _cache_source_analysis(
+        self, resource_url: str, content_hash: str, result_dict: dict
+    ) -> None:
+        cache = [
+            entry
+            for entry in json.loads(self.source_analysis_cache)
+            if entry["source_url"] != resource_url
+        ]
+        cache.append(
+            {
+                "source_url": resource_url,
+                "content_hash": content_hash,
+                "result": result_dict,
+            }
+        )
+        # Evict the least recently analyzed sources
+        self.source_analysis_cache = json.dumps(cache[-MAX_CACHED_SOURCE_ANALYSES:])
+
+    def _save_resolution_progress(self, sources: list[dict], error: str) -> None:
+        self.resolution_progress = json.dumps(
+            {"attempt": self.resolution_attempt, "sources": sources, "error": error}
+        )
+
+    def _evaluate_sources_batched(
+        self,
+        resources_to_check: list[str],
+        potential_outcomes: list[str],
+        outcome_index: dict[str, str],
+    ) -> dict:
+        prompt_context = self.prompt_context
+        max_source_chars = self.max_source_chars
+        extraction_hints = dict(zip(self.resolution_urls, self.extraction_hints))
+        structured_rules = dict(zip(self.resolution_urls, self.structured_rules))
+
+        # Sources with a structured rule are resolved without the LLM, in their own rounds
+        structured_sources = [
+            resource_url
+            for resource_url in resources_to_check
+            if structured_rules.get(resource_url)
+        ]
+        prompted_sources = [
+            resource_url
+            for resource_url in resources_to_check
+            if not structured_rules.get(resource_url)
+        ]
+        pending_structured_results = [
+            self._start_structured_evaluation(
+                resource_url, structured_rules[resource_url]
+            )
+            for resource_url in structured_sources
+        ]
+
+        def evaluate_sources_in_one_prompt() -> str:
+            # Fetch all the pages concurrently before building the prompt
+            pending_web_data = [
+                gl.get_webpage.lazy(resource_url, mode="text")
+                for resource_url in prompted_sources
+            ]
+
+            sources = ""
+            for index, resource_url in enumerate(prompted_sources):
+                resource_web_data, compaction = _compact_webpage(
+                    _apply_extraction_hint(
+                        pending_web_data[index].get(),
+                        extraction_hints.get(resource_url, ""),
+                    ),
+                    max_source_chars,
+                )
+                _trace(
+                    "source_fetched",
+                    source_url=resource_url,
+                    content_hash=_content_hash(resource_web_data),
+                    **compaction,
+                )
+                _trace(
+                    "source_content",
+                    TraceLevel.DEBUG,
+                    source_url=resource_url,
+                    content=resource_web_data,
+                )
+                sources += f"""
+<source index="{index + 1}">
+<source_url>
+{resource_url}
+</source_url>
+
+<webpage_content>
+{resource_web_data}
+</webpage_content>
+</source>
+"""
 
-        def evaluate_all_sources() -> str:
             task = f"""
-    You are an AI Validator tasked with resolving a prediction market Oracle. Your goal is to determine 
-    the correct outcome based on processed data from all of the individial data sources. Here are your inputs
-
-    ### Inputs
-    <title>
-    {title}
-    </title>
-
-    <description>
-    {description}
-    </description>
-
-    <potential_outcomes>
-    {potential_outcomes}
-    </potential_outcomes>
-
-    <rules>
-    {rules}
-    </rules>
-
-    <processed_data>
-    {analyzed_outputs}
-    </processed_data>
-
-    <current_date>
-    {datetime.now().astimezone()}
-    </current_date>
-
-    <earliest_resolution_date>
-    {earliest_resolution_date}
-    </earliest_resolution_date>
-
-    ### **Your Task:**
-    1. **Analyze the Inputs:**
-    - Carefully read and interpret the user-defined rules.
-    - Take into account all the processed data form the sources.
-    - Consider the resolution date in your analysis to ensure timeliness of the data.
-
-    2. **Determine The Outcome:**
-    - The output should be determined from the processed data form the resolution sources.
-    - Based on your analysis, decide which potential outcome is correct.
-    - If an outcome can be determined, but the outcome is not in the list of potential outcomes, the outcome should be `ERROR`.
-    - If the information is insufficient or inconclusive, and you cannot confidently determine an outcome, the outcome should be `UNDETERMINED`.
-    - Your response should reflect a coherent summary outcome from the previous analysis.
-    - If multiple sources contradict each other, refer to the rules to determine how to resolve the contradiction.
-    - If the rules do not provide a clear resolution, the outcome should be `ERROR`.
-
-    ### **Output Format:**
-
-    Provide your response in **valid JSON** format with the following structure:
-
-    ```json
-    {{
-    "relevant_sources": "List of URLs that are relevant to the outcome",
-    "reasoning": "Your detailed reasoning here",
-    "outcome": "Chosen outcome from the potential outcomes list, `UNDETERMINED` if undetermined, `ERROR` if the outcome is not in the potential outcomes list"        
-    }}
-    ```
+You are an AI Validator tasked with resolving a prediction market Oracle.
+Your goal is to determine the correct outcome based on the user-defined rules,
+the provided webpage contents of all the resolution sources, the resolution date, and the list of potential outcomes.
 
-    ### **Constraints and Considerations:**
+### Inputs
+{prompt_context}
 
-    - **Accuracy:** Base your decision strictly on the provided inputs.
-    - **Objectivity:** Remain neutral and unbiased.
-    - **Clarity:** Make sure your reason is easy to understand.
-    - **Validity:** Ensure the JSON output is properly formatted and free of errors. Do not include trailing commas.
+<sources>
+{sources}
+</sources>
 
-            """
+<current_date>
+{datetime.now().astimezone()}
+</current_date>
 
+{BATCHED_ANALYSIS_INSTRUCTIONS}"""
+            started = time.monotonic()
             result = gl.exec_prompt(task)
-            print(result)
+            _trace(
+                "sources_prompted",
+                seconds=round(time.monotonic() - started, 3),
+                prompt_chars=len(task),
+                output_chars=len(result),
+            )
+            _trace("batched_output", TraceLevel.DEBUG, output=result)
             return result
 
-        result = gl.eq_principle_prompt_comparative(
-            evaluate_all_sources,
-            principle="`outcome` field must be exactly the same. All other fields must be similar",
+        analyzed_outputs = [
+            (resource_url, _parse_json_dict(pending_result.get()))
+            for resource_url, pending_result in zip(
+                structured_sources, pending_structured_results
+            )
+        ]
+        if not prompted_sources:
+            return self._aggregate_source_analyses(
+                analyzed_outputs, potential_outcomes, outcome_index
+            )
+
+        if self.consensus_mode == ConsensusMode.STRICT.value:
+
+            def evaluate_sources_in_one_prompt_verdicts() -> str:
+                result_dict = _parse_json_dict(evaluate_sources_in_one_prompt())
+                sources = result_dict.get("sources", [])
+                return json.dumps(
+                    {
+                        **_normalize_verdict(result_dict, outcome_index),
+                        "sources": [
+                            {
+                                **_normalize_verdict(source, outcome_index),
+                                "source_url": resource_url,
+                            }
+                            for resource_url, source in zip(prompted_sources, sources)
+                        ],
+                    },
+                    sort_keys=True,
+                )
+
+            result = gl.eq_principle_strict_eq(evaluate_sources_in_one_prompt_verdicts)
+            result_dict = _parse_json_dict(result)
+            for source in result_dict["sources"]:
+                source["reasoning"] = _describe_verdict(source)
+            result_dict.update(
+                _analysis_from_sources(
+                    [
+                        (source["source_url"], source)
+                        for source in result_dict["sources"]
+                    ],
+                    result_dict["outcome"],
+                )
+            )
+        else:
+            result = gl.eq_principle_prompt_comparative(
+                evaluate_sources_in_one_prompt,
+                principle="`outcome` field and the `outcome` field of every entry in `sources` must be exactly the same. All other fields must be similar",
+            )
+            result_dict = _parse_json_dict(result)
+            for source in result_dict.get("sources", []):
+                source["outcome"] = _canonical_outcome(
+                    source.get("outcome", ""), outcome_index
+                )
+
+        if not structured_sources:
+            return result_dict
+
+        for source in result_dict.get("sources", []):
+            analyzed_outputs.append((source.get("source_url", ""), source))
+        return self._aggregate_source_analyses(
+            analyzed_outputs, potential_outcomes, outcome_index
         )
 
-        result_dict = _parse_json_dict(result)
-        self.analysis = json.dumps(result_dict)
+    def _status(self) -> Status:
+        return STORED_STATUSES[self.status]
 
-        if result_dict["outcome"] == "UNDETERMINED":
-            return
+    def _set_status(self, status: Status) -> None:
+        self.status = STORED_STATUSES.index(status)
 
-        if (
-            result_dict["outcome"] == "ERROR"
-            or result_dict["outcome"] not in self.potential_outcomes
-        ):
-            self.status = Status.ERROR.value
-            return
+    def _set_analysis(self, result_dict: dict) -> None:
+        summary, reasoning = _split_reasoning(result_dict)
+        self.analysis_summary = json.dumps(summary)
+        self.reasoning = json.dumps(reasoning)
 
-        self.outcome = result_dict["outcome"]
-        self.status = Status.RESOLVED.value
+    def _analysis(self) -> str:
+        # The full analysis JSON, as it was stored before the reasoning was split off
+        if not self.analysis_summary:
+            return ""
+        return json.dumps(
+            _join_reasoning(
+                json.loads(self.analysis_summary), json.loads(self.reasoning)
+            )
+        )
+
+    def _overall_reasoning(self) -> str:
+        if not self.reasoning:
+            return ""
+        return json.loads(self.reasoning)["reasoning"]
+
+    def _build_snapshot(self) -> None:
+        """
+        Builds the get_dict snapshot at construction, with the market fields that
+        never change afterwards.
+        """
+        self.snapshot = json.dumps(
+            {
+                # "creator": self.creator,
+                "title": self.title,
+                "description": self.description,
+                "potential_outcomes": list(self.potential_outcomes),
+                "rules": list(self.rules),
+                "data_source_domains": list(self.data_source_domains),
+                "resolution_urls": list(self.resolution_urls),
+                "status": self._status().value,
+                "earliest_resolution_date": self.earliest_resolution_date,
+                "analysis": self._analysis(),
+                "outcome": self.outcome,
+                "prediction_market_id": self.prediction_market_id,
+            }
+        )
+        self.snapshot_version += 1
+
+    def _refresh_snapshot(self) -> None:
+        """
+        Updates the get_dict snapshot after a resolve. Only the status, analysis and
+        outcome can change, so the market fields are not read out of storage again.
+        """
+        snapshot = json.loads(self.snapshot)
+        snapshot["status"] = self._status().value
+        snapshot["analysis"] = self._analysis()
+        snapshot["outcome"] = self.outcome
+        self.snapshot = json.dumps(snapshot)
+        self.snapshot_version += 1
 
     @gl.public.view
     def get_dict(self) -> dict[str, str]:
+        return json.loads(self.snapshot)
+
+    @gl.public.view
+    def get_fields(self, names: list[str]) -> dict:
+        """
+        Returns only the requested get_dict fields, plus `reasoning`, read straight from
+        their own storage slots.
+        """
+        readers = {
+            "title": lambda: self.title,
+            "description": lambda: self.description,
+            "potential_outcomes": lambda: list(self.potential_outcomes),
+            "rules": lambda: list(self.rules),
+            "data_source_domains": lambda: list(self.data_source_domains),
+            "resolution_urls": lambda: list(self.resolution_urls),
+            "status": lambda: self._status().value,
+            "earliest_resolution_date": lambda: self.earliest_resolution_date,
+            "analysis": self._analysis,
+            "reasoning": self._overall_reasoning,
+            "outcome": lambda: self.outcome,
+            "prediction_market_id": lambda: self.prediction_market_id,
+        }
+        fields = {}
+        for name in names:
+            if name not in readers:
+                raise ValueError(f"Unknown field: {name!r}")
+            fields[name] = readers[name]()
+        return fields
+
+    @gl.public.view
+    def get_summary(self) -> dict:
+        return self.get_fields(list(SUMMARY_FIELDS))
+
+    @gl.public.view
+    def get_snapshot_version(self) -> int:
+        """
+        Returns a number that changes whenever get_dict would return something new,
+        so callers can poll it and only fetch the full dict when it changed.
+        """
+        return self.snapshot_version
+
+    @gl.public.view
+    def get_reasoning(self) -> str:
+        return self._overall_reasoning()
+
+    @gl.public.view
+    def get_next_resolution_check(self) -> str:
+        """
+        Returns when the sources expect the event to have occurred, as an ISO date-time,
+        after an undetermined resolution. Empty when there is no hint.
+        """
+        return self.next_resolution_check
+
+    @gl.public.view
+    def get_resolution_progress(self) -> dict:
+        """
+        Returns the per-source outcomes saved by an unfinished resolution attempt and
+        the error that interrupted it. `sources` is empty when no attempt is pending.
+        """
+        if not self.resolution_progress:
+            return {
+                "attempt": self.resolution_attempt,
+                "started_at": "",
+                "sources": {},
+                "error": "",
+            }
+        progress = json.loads(self.resolution_progress)
         return {
-            # "creator": self.creator,
-            "title": self.title,
-            "description": self.description,
-            "potential_outcomes": list(self.potential_outcomes),
-            "rules": list(self.rules),
-            "data_source_domains": list(self.data_source_domains),
-            "resolution_urls": list(self.resolution_urls),
-            "status": self.status,
-            "earliest_resolution_date": self.earliest_resolution_date,
-            "analysis": self.analysis,
-            "outcome": self.outcome,
-            "prediction_market_id": self.prediction_market_id,
+            "attempt": progress["attempt"],
+            "started_at": self.resolution_attempt_started_at,
+            "sources": {
+                entry["source_url"]: entry["result"].get("outcome", "")
+                for entry in progress["sources"]
+            },
+            "error": progress["error"],
         }
 
+    @gl.public.view
+    def get_resolution_cooldown_until(self) -> str:
+        """
+        Returns the ISO date-time until which resolves are rejected after a completed
+        attempt, or an empty string when there is no cooldown.
+        """
+        return self.resolution_cooldown_until if self._in_resolution_cooldown() else ""
+
     @gl.public.view
     def get_status(self) -> str:
-        return self.status
+        return self._status().value
 
 
-def _parse_json_dict(json_str: str) -> dict:
+def _evidence_list(*evidence_urls: str) -> list[str]:
+    # Drops empty entries and duplicates, so each evidence page is evaluated once
+    return list(dict.fromkeys(url.strip() for url in evidence_urls if url.strip()))
+
+
+def _evidence_rejection(
+    evidence_urls: list[str], has_resolution_urls: bool
+) -> ResolveRejection | None:
+    # Checks the number of evidence URLs, their domains are checked by the oracle
+    if has_resolution_urls and evidence_urls:
+        return ResolveRejection.UNEXPECTED_EVIDENCE_URL
+
+    if not has_resolution_urls and not evidence_urls:
+        return ResolveRejection.MISSING_EVIDENCE_URL
+
+    if len(evidence_urls) > MAX_EVIDENCE_URLS:
+        return ResolveRejection.TOO_MANY_EVIDENCE_URLS
+
+    return None
+
+
+def _normalize_domain(value: str) -> str:
     """
-    Used to sanitize the JSON output from the LLM.
-    Remove everything before the first '{' and after the last '}', and remove trailing commas before closing braces/brackets
+    Reduces a domain or URL to its lowercased host, without scheme, port, trailing dot
+    or leading "www." label. Returns an empty string when there is no usable host.
+    """
+    value = value.strip().lower()
+    if "://" not in value:
+        value = f"//{value}"
+    host = urlparse(value).hostname or ""
+    host = host.rstrip(".")
+    if host.startswith("www."):
+        host = host[len("www.") :]
+    if not host or "" in host.split("."):
+        return ""
+    return host
+
+
+def _domain_index_key(domain: str) -> str:
+    # "sport.bbc.com" -> "com.bbc.sport", so that a domain is a prefix of its subdomains
+    return ".".join(reversed(domain.split(".")))
+
+
+def _domain_lookup_keys(host: str) -> list[str]:
+    """
+    Returns the index keys of the host and of every domain it is a subdomain of,
+    e.g. "sport.bbc.com" -> ["com", "com.bbc", "com.bbc.sport"].
+    """
+    labels = _domain_index_key(host).split(".")
+    return [".".join(labels[: length + 1]) for length in range(len(labels))]
+
+
+def _parse_structured_rule(rule: str, potential_outcomes: list[str]) -> dict:
+    """
+    Validates a structured rule such as
+    {"json_path": "match.winner", "outcome_map": {"HOME": "Bayern Munich"}}.
+    `json_path` is a dot separated path into the JSON document served by the source
+    (list items are addressed by index), and `outcome_map` maps the values found
+    there to potential outcomes. An empty rule means the source is analyzed by the LLM.
+    """
+    if not rule.strip():
+        return {}
+
+    try:
+        parsed_rule = json.loads(rule)
+    except json.JSONDecodeError:
+        raise ValueError(f"Structured rule is not valid JSON: {rule}")
+
+    if not isinstance(parsed_rule, dict):
+        raise ValueError(f"Structured rule must be a JSON object: {rule}")
+
+    json_path = parsed_rule.get("json_path")
+    outcome_map = parsed_rule.get("outcome_map")
+    if not isinstance(json_path, str) or not json_path.strip():
+        raise ValueError(f"Structured rule is missing a `json_path`: {rule}")
+    if not isinstance(outcome_map, dict) or not outcome_map:
+        raise ValueError(f"Structured rule is missing an `outcome_map`: {rule}")
+
+    for value, outcome in outcome_map.items():
+        if outcome not in potential_outcomes:
+            raise ValueError(
+                f"Structured rule maps `{value}` to an unknown outcome: {outcome}"
+            )
+
+    return {"json_path": json_path.strip(), "outcome_map": outcome_map}
+
+
+def _apply_structured_rule(resource_web_data: str, structured_rule: dict) -> dict:
+    """
+    Deterministically resolves a source from its structured rule.
+    Returns a per-source result in the same shape as the LLM analysis.
     """
-    first_brace = json_str.find("{")
-    last_brace = json_str.rfind("}")
-    json_str = json_str[first_brace : last_brace + 1]
+    json_path = structured_rule["json_path"]
+    try:
+        value = json.loads(resource_web_data)
+        for key in json_path.removeprefix("$.").split("."):
+            value = value[int(key)] if isinstance(value, list) else value[key]
+    except (json.JSONDecodeError, KeyError, IndexError, TypeError, ValueError):
+        return {
+            "valid_source": "false",
+            "event_has_occurred": "false",
+            "reasoning": f"No value was found at `{json_path}` in the source.",
+            "outcome": "UNDETERMINED",
+        }
+
+    value = value if isinstance(value, str) else json.dumps(value)
+    outcome = structured_rule["outcome_map"].get(value)
+    if outcome is None:
+        return {
+            "valid_source": "true",
+            "event_has_occurred": "false",
+            "reasoning": f"The value `{value}` at `{json_path}` does not map to any outcome.",
+            "outcome": "UNDETERMINED",
+        }
+
+    return {
+        "valid_source": "true",
+        "event_has_occurred": "true",
+        "reasoning": f"The value `{value}` at `{json_path}` maps to `{outcome}`.",
+        "outcome": outcome,
+    }
+
+
+def _parse_extraction_hint(hint: str) -> tuple[str, str | tuple[int, int]]:
+    """
+    Parses an extraction hint into its kind and argument. Supported hints:
+    - "" (no hint): the whole page is used
+    - "anchor:<text>": the lines starting at the first line containing <text>
+    - "keyword:<text>": every line containing <text>, with a few lines of context around it
+    - "lines:<start>-<end>": the 1-based, inclusive line range of the fetched text
+    """
+    if not hint:
+        return "", ""
+
+    kind, separator, argument = hint.partition(":")
+    kind = kind.strip().lower()
+    argument = argument.strip()
+    if not separator or not argument:
+        raise ValueError(f"Invalid extraction hint: {hint}")
+
+    if kind in ("anchor", "keyword"):
+        return kind, argument.lower()
+
+    if kind == "lines":
+        start, _, end = argument.partition("-")
+        if not start.strip().isdigit() or not end.strip().isdigit():
+            raise ValueError(f"Invalid line range in extraction hint: {hint}")
+        first_line, last_line = int(start), int(end)
+        if first_line < 1 or last_line < first_line:
+            raise ValueError(f"Invalid line range in extraction hint: {hint}")
+        return kind, (first_line, last_line)
+
+    raise ValueError(f"Unknown extraction hint kind: {kind}")
+
+
+def _apply_extraction_hint(text: str, hint: str) -> str:
+    """
+    Returns the region of the page selected by the extraction hint.
+    Falls back to the whole page when the hint does not match anything.
+    """
+    kind, argument = _parse_extraction_hint(hint)
+    if not kind:
+        return text
+
+    lines = text.splitlines()
+    if kind == "lines":
+        first_line, last_line = argument
+        selected = lines[first_line - 1 : last_line]
+    elif kind == "anchor":
+        selected = []
+        for index, line in enumerate(lines):
+            if argument in line.lower():
+                selected = lines[index : index + EXTRACTION_HINT_ANCHOR_LINES]
+                break
+    else:
+        keep = set()
+        for index, line in enumerate(lines):
+            if argument in line.lower():
+                keep.update(
+                    range(
+                        index - EXTRACTION_HINT_CONTEXT_LINES,
+                        index + EXTRACTION_HINT_CONTEXT_LINES + 1,
+                    )
+                )
+        selected = [line for index, line in enumerate(lines) if index in keep]
+
+    if not selected:
+        return text
+
+    return "\n".join(selected)
+
+
+def _trace(event: str, level: TraceLevel = TraceLevel.INFO, **fields) -> None:
+    """
+    Emits one JSON line per event when `TRACE_LEVEL` is at least `level`.
+    Full payloads (webpages, LLM outputs) are only traced at DEBUG level.
+    """
+    if TRACE_LEVEL.value < level.value:
+        return
+    print(json.dumps({"event": event, **fields}, default=str))
+
+
+def _render_prompt_context(
+    title: str,
+    description: str,
+    potential_outcomes: list[str],
+    rules: list[str],
+    earliest_resolution_date: str,
+) -> str:
+    """
+    Renders the market inputs that every prompt shares. They are fixed after
+    construction, so they are rendered once and stored.
+    """
+    return f"""<title>
+{title}
+</title>
+
+<description>
+{description}
+</description>
+
+<potential_outcomes>
+{potential_outcomes}
+</potential_outcomes>
+
+<rules>
+{rules}
+</rules>
+
+<earliest_resolution_date>
+{earliest_resolution_date}
+</earliest_resolution_date>"""
+
+
+def _split_into_chunks(text: str, max_chars: int) -> list[str]:
+    """
+    Splits text into chunks of at most `max_chars` characters, at line boundaries where possible.
+    """
+    chunks = []
+    current = ""
+    for line in text.splitlines():
+        while len(line) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + 1 + len(line) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _extract_relevant_facts(text: str, max_chars: int, prompt_context: str) -> str:
+    """
+    Map step of the chunked evaluation: scans an oversized page one chunk at a time
+    and keeps only the facts relevant to the market, so no prompt holds more than
+    `max_chars` of page content. Must be called from a non-deterministic block.
+    """
+    chunks = _split_into_chunks(text, max_chars)
+    facts = []
+    for index, chunk in enumerate(chunks):
+        task = f"""
+You are helping an AI Validator resolve a prediction market.
+You are given one part of a webpage that is too large to be analyzed at once.
+Extract only the facts from this part that are relevant to resolving the prediction market.
+
+### Inputs
+{prompt_context}
+
+<webpage_part index="{index + 1}" total="{len(chunks)}">
+{chunk}
+</webpage_part>
+
+{FACT_EXTRACTION_INSTRUCTIONS}"""
+        chunk_facts = gl.exec_prompt(task).strip()
+        if chunk_facts and chunk_facts != "NONE":
+            facts.append(f"[Part {index + 1} of {len(chunks)}]\n{chunk_facts}")
+
+    relevant_facts, _ = _compact_webpage("\n".join(facts), max_chars)
+    return relevant_facts
+
+
+def _compact_webpage(text: str, max_chars: int) -> tuple[str, dict]:
+    """
+    Deterministically shrinks webpage text before it is put into a prompt.
+    Collapses whitespace, drops empty lines, boilerplate lines (cookie banners, footers, ...)
+    and repeated long lines, then cuts the result at a line boundary to fit `max_chars` (0 for no limit).
+    Returns the compacted text and a report of how much was removed.
+    """
+    kept_lines = []
+    seen_lines = set()
+    boilerplate_lines = 0
+    repeated_lines = 0
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            continue
+        is_boilerplate = len(line) <= MAX_BOILERPLATE_LINE_CHARS and bool(
+            BOILERPLATE_LINE_PATTERN.search(line)
+        )
+        if is_boilerplate:
+            boilerplate_lines += 1
+            continue
+        if len(line) >= MIN_REPEATED_LINE_CHARS:
+            if line in seen_lines:
+                repeated_lines += 1
+                continue
+            seen_lines.add(line)
+        kept_lines.append(line)
+
+    compacted = "\n".join(kept_lines)
+    truncated_chars = 0
+    if max_chars > 0 and len(compacted) > max_chars:
+        cut = compacted.rfind("\n", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        truncated_chars = len(compacted) - cut
+        compacted = compacted[:cut]
+
+    return compacted, {
+        "original_chars": len(text),
+        "compacted_chars": len(compacted),
+        "boilerplate_lines": boilerplate_lines,
+        "repeated_lines": repeated_lines,
+        "truncated_chars": truncated_chars,
+    }
+
+
+def _outcome_key(outcome: str) -> str:
+    """
+    Normalizes an outcome for matching: surrounding quotes dropped, accents stripped,
+    case-folded and whitespace runs collapsed. Punctuation is kept, so "<50%" and
+    ">50%" stay apart.
+    """
+    decomposed = unicodedata.normalize("NFKD", _strip_outcome(outcome))
+    without_accents = "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+    return " ".join(without_accents.casefold().split())
+
+
+def _strip_outcome(outcome: str) -> str:
+    return str(outcome).strip().strip("`'\"").strip()
+
+
+def _build_outcome_index(
+    potential_outcomes: list[str], outcome_aliases: dict[str, list[str]]
+) -> dict[str, str]:
+    """
+    Maps the normalized form of every outcome and alias to its outcome, so model
+    outputs can be matched to outcomes. Outcomes that only differ by case or accents
+    share a key, which then maps to "" and leaves them to exact matching. Aliases
+    must name a potential outcome and must not be empty or ambiguous.
+    """
+    outcome_index = {}
+    for outcome in [*potential_outcomes, "UNDETERMINED", "ERROR"]:
+        key = _outcome_key(outcome)
+        if key:
+            is_ambiguous = outcome_index.get(key, outcome) != outcome
+            outcome_index[key] = "" if is_ambiguous else outcome
+
+    for outcome, aliases in outcome_aliases.items():
+        outcome = outcome.strip()
+        if outcome not in potential_outcomes:
+            raise ValueError(f"Aliases given for unknown outcome: {outcome!r}")
+        for alias in aliases:
+            key = _outcome_key(alias)
+            if not key or outcome_index.get(key, outcome) != outcome:
+                raise ValueError(f"Ambiguous or empty outcome alias: {alias!r}")
+            outcome_index[key] = outcome
+
+    return outcome_index
+
+
+def _canonical_outcome(outcome: str, outcome_index: dict[str, str]) -> str:
+    # Unknown and ambiguous outcomes are returned stripped, for exact matching
+    return outcome_index.get(_outcome_key(outcome)) or _strip_outcome(outcome)
+
+
+def _normalize_verdict(result_dict: dict, outcome_index: dict[str, str]) -> dict:
+    """
+    Keeps only the fields validators must agree on, in a canonical form, so that
+    results can be compared with strict equality. The reasoning is left out.
+    """
+    verdict = {
+        "outcome": _canonical_outcome(result_dict.get("outcome", ""), outcome_index)
+    }
+    for flag in ["valid_source", "event_has_occurred"]:
+        if flag in result_dict:
+            verdict[flag] = (
+                "true"
+                if str(result_dict[flag]).strip().lower() in ("true", "yes", "1")
+                else "false"
+            )
+    return verdict
+
+
+def _describe_verdict(result_dict: dict) -> str:
+    """
+    Deterministic reasoning for verdicts agreed on without the LLM's own reasoning.
+    """
+    description = []
+    if "valid_source" in result_dict:
+        description.append(
+            "The source is relevant to the event."
+            if result_dict["valid_source"] == "true"
+            else "The source is not relevant to the event."
+        )
+    if "event_has_occurred" in result_dict:
+        description.append(
+            "The event has occurred."
+            if result_dict["event_has_occurred"] == "true"
+            else "The event has not occurred yet."
+        )
+    description.append(f"Outcome: {result_dict.get('outcome', '')}.")
+    return " ".join(description)
+
+
+def _next_resolution_check(
+    analyzed_outputs: list[tuple[str, dict]], now: datetime
+) -> str:
+    """
+    Returns the earliest future completion time expected by the sources that say the
+    event has not occurred, capped at MAX_NEXT_RESOLUTION_CHECK_DELAY from now.
+    Returns an empty string if a source says the event has occurred or none gives a time.
+    """
+    expected_completions = []
+    for _, result_dict in analyzed_outputs:
+        if str(result_dict.get("event_has_occurred", "")).strip().lower() == "true":
+            return ""
+        try:
+            expected_completion = datetime.fromisoformat(
+                str(result_dict.get("expected_completion", "")).strip()
+            )
+        except ValueError:
+            continue
+        if expected_completion.tzinfo is None:
+            expected_completion = expected_completion.replace(tzinfo=timezone.utc)
+        if expected_completion > now:
+            expected_completions.append(expected_completion)
+
+    if not expected_completions:
+        return ""
+    return min(
+        min(expected_completions), now + MAX_NEXT_RESOLUTION_CHECK_DELAY
+    ).isoformat()
+
 
-    # Remove trailing commas before closing braces/brackets
-    import re
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-    json_str = re.sub(r",(?!\s*?[\{\[\"\'\w])", "", json_str)
-    print(json_str)
 
-    return json.loads(json_str)
+def _agreed_outcome(
+    analyzed_outputs: list[tuple[str, dict]], potential_outcomes: list[str]
+) -> str | None:
+    """
+    Returns the outcome that can be committed without an aggregation round, or None.
+    A single source is taken as is. Multiple sources must all agree on the same potential outcome.
+    """
+    outcomes = [result_dict.get("outcome") for _, result_dict in analyzed_outputs]
+    if len(outcomes) == 1 and isinstance(outcomes[0], str):
+        return outcomes[0]
+
+    if (
+        len(outcomes) > 1
+        and len(set(outcomes)) == 1
+        and outcomes[0] in potential_outcomes
+    ):
+        return outcomes[0]
+
+    return None
+
+
+def _leading_outcome(
+    analyzed_outputs: list[tuple[str, dict]], potential_outcomes: list[str]
+) -> tuple[str, int]:
+    """
+    Returns the potential outcome supported by the most sources and its number of votes.
+    Ties go to the outcome listed first in `potential_outcomes`.
+    """
+    outcomes = [result_dict.get("outcome") for _, result_dict in analyzed_outputs]
+    votes = [outcomes.count(outcome) for outcome in potential_outcomes]
+    best = votes.index(max(votes))
+    return potential_outcomes[best], votes[best]
+
+
+def _split_reasoning(result_dict: dict) -> tuple[dict, dict]:
+    """
+    Separates the overall and per-source reasoning of an analysis from the rest of it.
+    """
+    summary = {key: value for key, value in result_dict.items() if key != "reasoning"}
+    reasoning = {"reasoning": str(result_dict.get("reasoning", ""))}
+    sources = summary.get("sources")
+    if isinstance(sources, list) and all(isinstance(item, dict) for item in sources):
+        summary["sources"] = [
+            {key: value for key, value in source.items() if key != "reasoning"}
+            for source in summary["sources"]
+        ]
+        reasoning["sources"] = [
+            str(source.get("reasoning", "")) for source in result_dict["sources"]
+        ]
+    return summary, reasoning
+
+
+def _join_reasoning(summary: dict, reasoning: dict) -> dict:
+    # Reverses _split_reasoning, the overall reasoning comes last
+    analysis = dict(summary)
+    if "sources" in reasoning:
+        analysis["sources"] = [
+            {**source, "reasoning": source_reasoning}
+            for source, source_reasoning in zip(
+                summary["sources"], reasoning["sources"]
+            )
+        ]
+    analysis["reasoning"] = reasoning["reasoning"]
+    return analysis
+
+
+def _analysis_from_sources(
+    analyzed_outputs: list[tuple[str, dict]], outcome: str
+) -> dict:
+    """
+    Builds the analysis record from the per-source results, in the same shape as the aggregation output.
+    """
+    return {
+        "relevant_sources": [
+            resource_url
+            for resource_url, result_dict in analyzed_outputs
+            if result_dict.get("outcome") == outcome
+        ],
+        "reasoning": "\n".join(
+            f"{resource_url}: {result_dict.get('reasoning', '')}"
+            for resource_url, result_dict in analyzed_outputs
+        ),
+        "outcome": outcome,
+    }
+
+
+def _brace_block_end(text: str, start: int) -> int:
+    """
+    Returns the position after the brace that closes the one at `start`, or the end of
+    the text. Strings are not taken into account, as the block is malformed anyway.
+    """
+    depth = 0
+    for match in re.finditer(r"[{}]", text[start:]):
+        depth += 1 if match.group() == "{" else -1
+        if depth == 0:
+            return start + match.end()
+    return len(text)
+
+
+def _parse_json_dict(json_str: str) -> dict:
+    """
+    Used to sanitize the JSON output from the LLM.
+    Decodes the first JSON object with the standard decoder, skipping any text or code
+    fences around it. When decoding stops at a closing brace/bracket right after a
+    comma, that trailing comma is removed and the object is decoded again from its
+    start, once per trailing comma. If an object still does not parse, the text is
+    scanned for the brace that closes it and the next object after it is tried, never
+    one nested inside it.
+    """
+    start = json_str.find("{")
+    while start != -1:
+        candidate = json_str
+        while True:
+            try:
+                parsed, _ = JSON_DECODER.raw_decode(candidate, start)
+                break
+            except json.JSONDecodeError as error:
+                comma = candidate.rfind(",", start, error.pos)
+                if (
+                    candidate[error.pos : error.pos + 1] not in ("}", "]")
+                    or comma == -1
+                    or candidate[comma + 1 : error.pos].strip()
+                ):
+                    parsed = None
+                    break
+                candidate = candidate[:comma] + candidate[comma + 1 :]
+
+        if isinstance(parsed, dict):
+            return parsed
+        start = json_str.find("{", _brace_block_end(json_str, start))
+
+    raise LLMOutputError(f"No JSON object found in the LLM output: {json_str[:200]}")
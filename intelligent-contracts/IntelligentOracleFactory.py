@@ -1,13 +1,59 @@
 # { "Depends": "py-genlayer:test" }
 
+import json
+from enum import Enum
 from genlayer import *
 
 
+class TraceLevel(Enum):
+    OFF = 0
+    INFO = 1  # Deployed oracles, batch errors and status syncs
+    DEBUG = 2  # Also the full oracle constructor arguments
+
+
+# Tracing is off by default, raise it before deploying to debug the Registry
+TRACE_LEVEL = TraceLevel.OFF
+
+# Largest number of addresses returned by one call to a listing view
+MAX_PAGE_SIZE = 100
+
+# Indexed status of oracles whose status could not be read at their last sync
+UNREACHABLE_STATUS = "Unreachable"
+
+# IntelligentOracle constructor parameters in order, with their defaults. The oracle
+# cannot be imported here, so its defaults (EvaluationMode.PER_SOURCE,
+# DEFAULT_MAX_SOURCE_CHARS, ConsensusMode.COMPARATIVE, ...) are repeated, and
+# test_registry_helpers.py checks them against the oracle constructor
+REQUIRED = object()
+ORACLE_PARAMETERS = (
+    ("prediction_market_id", REQUIRED),
+    ("title", REQUIRED),
+    ("description", REQUIRED),
+    ("potential_outcomes", REQUIRED),
+    ("rules", REQUIRED),
+    ("data_source_domains", REQUIRED),
+    ("resolution_urls", REQUIRED),
+    ("earliest_resolution_date", REQUIRED),
+    ("evaluation_mode", "per_source"),
+    ("max_source_chars", 40000),
+    ("extraction_hints", []),
+    ("structured_rules", []),
+    ("consensus_mode", "comparative"),
+    ("quorum", 0),
+    ("enforce_next_resolution_check", False),
+    ("outcome_aliases", {}),
+)
+
+
 @gl.contract
 class Registry:
     # Declare persistent storage fields
     contract_addresses: DynArray[str]
     intelligent_oracle_code: str
+    market_addresses: TreeMap[str, str]  # prediction_market_id to oracle address
+    oracle_statuses: TreeMap[str, str]  # Oracle address to its last synced status
+    status_addresses: TreeMap[str, DynArray[str]]  # Status to oracle addresses
+    status_positions: TreeMap[str, u32]  # Oracle address to its index in the above
 
     def __init__(self):
         with open("/contract/IntelligentOracle.py", "rt") as f:
@@ -24,26 +70,239 @@ class Registry:
         data_source_domains: list[str],
         resolution_urls: list[str],
         earliest_resolution_date: str,
+        evaluation_mode: str | None = None,
+        max_source_chars: int | None = None,
+        extraction_hints: list[str] | None = None,
+        structured_rules: list[str] | None = None,
+        consensus_mode: str | None = None,
+        quorum: int | None = None,
+        enforce_next_resolution_check: bool | None = None,
+        outcome_aliases: dict[str, list[str]] | None = None,
     ) -> None:
+        spec = {
+            "prediction_market_id": prediction_market_id,
+            "title": title,
+            "description": description,
+            "potential_outcomes": potential_outcomes,
+            "rules": rules,
+            "data_source_domains": data_source_domains,
+            "resolution_urls": resolution_urls,
+            "earliest_resolution_date": earliest_resolution_date,
+            "evaluation_mode": evaluation_mode,
+            "max_source_chars": max_source_chars,
+            "extraction_hints": extraction_hints,
+            "structured_rules": structured_rules,
+            "consensus_mode": consensus_mode,
+            "quorum": quorum,
+            "enforce_next_resolution_check": enforce_next_resolution_check,
+            "outcome_aliases": outcome_aliases,
+        }
+        # Optional arguments left out take their default from ORACLE_PARAMETERS
+        self._deploy_oracle(
+            self.intelligent_oracle_code.encode("utf-8"),
+            _oracle_args(
+                {name: value for name, value in spec.items() if value is not None}
+            ),
+        )
+
+    @gl.public.write
+    def create_new_prediction_markets(self, specs: list[dict]) -> list[dict]:
+        """
+        Deploys one oracle per spec in a single transaction. A spec holds the
+        create_new_prediction_market arguments by name. Returns one entry per spec, in
+        order, with the new oracle's address or the error that kept it from being deployed.
+        """
+        code = self.intelligent_oracle_code.encode("utf-8")
+        results = []
+        for spec in specs:
+            result = {
+                "prediction_market_id": str(spec.get("prediction_market_id", "")),
+                "address": "",
+                "error": "",
+            }
+            try:
+                result["address"] = self._deploy_oracle(code, _oracle_args(spec))
+            except Exception as error:
+                result["error"] = str(error)
+                _trace(
+                    "oracle_not_deployed",
+                    prediction_market_id=result["prediction_market_id"],
+                    error=result["error"],
+                )
+            results.append(result)
+        return results
+
+    def _deploy_oracle(self, code: bytes, args: list) -> str:
+        prediction_market_id = args[0]
+        if prediction_market_id in self.market_addresses:
+            raise ValueError(
+                f"Prediction market {prediction_market_id!r} already has an oracle."
+            )
+
         registered_contracts = len(self.contract_addresses)
         contract_address = gl.deploy_contract(
-            code=self.intelligent_oracle_code.encode("utf-8"),
-            args=[
-                prediction_market_id,
-                title,
-                description,
-                potential_outcomes,
-                rules,
-                data_source_domains,
-                resolution_urls,
-                earliest_resolution_date,
-            ],
+            code=code,
+            args=args,
             salt_nonce=registered_contracts + 1,
         )
-        print("contract_address", contract_address)
-        print("contract_address type", type(contract_address))
+        _trace(
+            "oracle_deployed",
+            prediction_market_id=prediction_market_id,
+            address=contract_address.as_hex,
+        )
+        _trace("oracle_args", TraceLevel.DEBUG, args=args)
         self.contract_addresses.append(contract_address.as_hex)
+        self.market_addresses[prediction_market_id] = contract_address.as_hex
+        self._index_status(contract_address.as_hex, "Active")
+        return contract_address.as_hex
+
+    def _oracle_status(self, address: str) -> str:
+        """
+        Returns the status of the oracle, or an empty string if it cannot be read:
+        its deployment may still be pending, its constructor may have failed or the
+        call may have failed for an unrelated reason, which cannot be told apart here.
+        """
+        try:
+            fields = gl.ContractAt(Address(address)).view().get_fields(["status"])
+        except Exception:  # Any failure of the other contract, which we cannot narrow
+            return ""
+        return fields["status"]
+
+    def _index_status(self, address: str, status: str) -> None:
+        """
+        Moves the address to the status in the index. Removal swaps the last address
+        of the old status into the freed slot, so it does not depend on the list size.
+        """
+        previous_status = self.oracle_statuses.get(address, "")
+        if previous_status == status:
+            return
+
+        if previous_status:
+            addresses = self.status_addresses[previous_status]
+            position = self.status_positions[address]
+            last_address = addresses[len(addresses) - 1]
+            addresses[position] = last_address
+            self.status_positions[last_address] = position
+            addresses.pop()
+
+        addresses = self.status_addresses.get_or_insert_default(status)
+        self.status_positions[address] = len(addresses)
+        addresses.append(address)
+        self.oracle_statuses[address] = status
+
+    @gl.public.write
+    def sync_statuses(self, addresses: list[str]) -> None:
+        """
+        Refreshes the status index from the given oracles. Oracles do not report their
+        status changes, so keepers call this after resolving markets. Unknown addresses
+        are skipped, and oracles whose status cannot be read are indexed as unreachable
+        until a later sync reads it. Their market ids stay reserved.
+        """
+        for address in addresses:
+            if address not in self.oracle_statuses:
+                continue
+            status = self._oracle_status(address) or UNREACHABLE_STATUS
+            _trace("oracle_status_synced", address=address, status=status)
+            self._index_status(address, status)
 
     @gl.public.view
-    def get_contract_addresses(self) -> list[str]:
-        return list(self.contract_addresses)
+    def get_address_for_market(self, prediction_market_id: str) -> str:
+        """
+        Returns the oracle address of the market, or an empty string if it has none.
+        """
+        return self.market_addresses.get(prediction_market_id, "")
+
+    @gl.public.view
+    def get_addresses_by_status(
+        self, status: str, offset: int = 0, limit: int = MAX_PAGE_SIZE
+    ) -> list[str]:
+        """
+        Returns a page of the oracles with the status as of their last sync, in no
+        particular order.
+        """
+        if status not in self.status_addresses:
+            return []
+        addresses = self.status_addresses[status]
+        return [addresses[index] for index in _page(offset, limit, len(addresses))]
+
+    @gl.public.view
+    def get_contract_addresses(
+        self, offset: int = 0, limit: int = MAX_PAGE_SIZE
+    ) -> list[str]:
+        """
+        Returns a page of the oracle addresses in creation order. New oracles are only
+        appended, so clients can fetch the tail from the count they last synced.
+        """
+        return [
+            self.contract_addresses[index]
+            for index in _page(offset, limit, len(self.contract_addresses))
+        ]
+
+    @gl.public.view
+    def get_contract_count(self) -> int:
+        return len(self.contract_addresses)
+
+
+def _trace(event: str, level: TraceLevel = TraceLevel.INFO, **fields) -> None:
+    """
+    Emits one JSON line per event when `TRACE_LEVEL` is at least `level`.
+    """
+    if TRACE_LEVEL.value < level.value:
+        return
+    print(json.dumps({"event": event, **fields}, default=str))
+
+
+def _oracle_args(spec: dict) -> list:
+    """
+    Orders a market spec into IntelligentOracle constructor arguments, filling in
+    defaults. Repeats the deterministic checks of the IntelligentOracle constructor,
+    which cannot be caught once the deployment is scheduled, with the same messages;
+    test_registry_helpers.py checks that the oracle still raises them.
+    """
+    names = [name for name, _ in ORACLE_PARAMETERS]
+    unknown = [name for name in spec if name not in names]
+    if unknown:
+        raise ValueError(f"Unknown market parameters: {', '.join(unknown)}")
+
+    args = []
+    for name, default in ORACLE_PARAMETERS:
+        if name in spec:
+            args.append(spec[name])
+        elif default is REQUIRED:
+            raise ValueError(f"Missing market parameter: {name}")
+        else:
+            args.append(default)
+
+    market = dict(zip(names, args))
+    if not all(
+        market[name]
+        for name in [
+            "prediction_market_id",
+            "title",
+            "description",
+            "potential_outcomes",
+            "rules",
+            "earliest_resolution_date",
+        ]
+    ):
+        raise ValueError("Missing required fields.")
+
+    if not market["resolution_urls"] and not market["data_source_domains"]:
+        raise ValueError("Missing resolution URLs or data source domains.")
+
+    if market["resolution_urls"] and market["data_source_domains"]:
+        raise ValueError("Cannot provide both resolution URLs and data source domains.")
+
+    if len(market["potential_outcomes"]) < 2:
+        raise ValueError("At least two potential outcomes are required.")
+
+    if len(market["potential_outcomes"]) != len(set(market["potential_outcomes"])):
+        raise ValueError("Potential outcomes must be unique.")
+
+    return args
+
+
+def _page(offset: int, limit: int, size: int) -> range:
+    # Indexes of a page, with the limit capped at MAX_PAGE_SIZE
+    start = max(offset, 0)
+    return range(start, min(start + max(min(limit, MAX_PAGE_SIZE), 0), size))
@@ -0,0 +1,55 @@
+"""
+Benchmark of the JSON extractor used on LLM outputs against the previous
+find/rfind + regex implementation, over the corpus in fixtures/llm_outputs.json.
+
+Run from the `test` directory: python bench_json_extractor.py
+"""
+
+import re
+import json
+import timeit
+from pathlib import Path
+from tools.contract import load_contract_helpers
+
+parse_json_dict = load_contract_helpers()["_parse_json_dict"]
+corpus = json.loads((Path(__file__).parent / "fixtures/llm_outputs.json").read_text())
+
+
+def previous_parse_json_dict(json_str: str) -> dict:
+    # Previous implementation, without its debug print
+    first_brace = json_str.find("{")
+    last_brace = json_str.rfind("}")
+    json_str = json_str[first_brace : last_brace + 1]
+    json_str = re.sub(r",(?!\s*?[\{\[\"\'\w])", "", json_str)
+    return json.loads(json_str)
+
+
+def failures(parse) -> list[str]:
+    failed = []
+    for sample in corpus:
+        try:
+            if parse(sample["output"]) != sample["expected"]:
+                failed.append(sample["name"])
+        except ValueError:
+            # Outputs expected to be rejected count as handled when they raise
+            if sample["expected"] is not None:
+                failed.append(sample["name"])
+    return failed
+
+
+def main() -> None:
+    runs = 2000
+    for name, parse in [
+        ("previous", previous_parse_json_dict),
+        ("raw_decode", parse_json_dict),
+    ]:
+        failed = failures(parse)
+        seconds = timeit.timeit(lambda: failures(parse), number=runs) / runs
+        print(
+            f"{name:<12} {seconds / len(corpus) * 1e6:6.2f} us/output, "
+            f"{len(failed)}/{len(corpus)} failed {failed}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Micro-benchmark of the static prompt context: rendered on every resolve
+(previous behaviour) vs rendered once at construction and read from storage.
+Storage reads are counted by running each path once against an instrumented
+stand-in for the oracle storage; timings use plain attributes.
+
+Only the reads that build the prompt inputs are modelled. A resolve also reads
+the outcomes, the outcome index and the other fields it needs once, whichever
+way the prompt context is built, so these are not the reads of a whole resolve.
+
+Run from the `test` directory: python bench_prompt_context.py
+"""
+
+import timeit
+from tools.contract import load_contract_helpers
+
+helpers = load_contract_helpers()
+render_prompt_context = helpers["_render_prompt_context"]
+
+market = {
+    "title": "Football Prediction Market",
+    "description": "Predict the outcome of a football match",
+    "potential_outcomes": ["Bayern Munich", "Arsenal", "Draw"],
+    "rules": [
+        f"Rule {index}: the outcome is the result of the match" for index in range(10)
+    ],
+    "earliest_resolution_date": "2024-01-01T00:00:00+00:00",
+}
+market["prompt_context"] = render_prompt_context(
+    market["title"],
+    market["description"],
+    market["potential_outcomes"],
+    market["rules"],
+    market["earliest_resolution_date"],
+)
+# Prompts that embed the market inputs in a resolve: one per source plus aggregation
+prompts_per_resolve = 4
+
+
+class CountedArray:
+    """
+    Stand-in for a DynArray storage field that counts slot reads: one for the length
+    and one per item, as iterating a DynArray reads its length before its items.
+    """
+
+    def __init__(self, items: list, storage: "CountedStorage"):
+        self.items = items
+        self.storage = storage
+
+    def __len__(self) -> int:
+        self.storage.reads += 1
+        return len(self.items)
+
+    def __getitem__(self, index: int):
+        self.storage.reads += 1
+        return self.items[index]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class CountedStorage:
+    """
+    Stand-in for the oracle storage that counts field reads.
+    """
+
+    def __init__(self, fields: dict):
+        self.reads = 0
+        self.fields = {
+            name: CountedArray(value, self) if isinstance(value, list) else value
+            for name, value in fields.items()
+        }
+
+    def __getattr__(self, name: str):
+        self.reads += 1
+        return self.fields[name]
+
+
+class Storage:
+    def __init__(self, fields: dict):
+        self.__dict__.update(fields)
+
+
+def per_resolve_rendering(oracle) -> None:
+    # Storage is copied into lists and the inputs are rendered for every prompt
+    outcomes = list(oracle.potential_outcomes)
+    market_rules = list(oracle.rules)
+    title = oracle.title
+    description = oracle.description
+    earliest_resolution_date = oracle.earliest_resolution_date
+    for _ in range(prompts_per_resolve):
+        render_prompt_context(
+            title, description, outcomes, market_rules, earliest_resolution_date
+        )
+
+
+def prerendered_context(oracle) -> None:
+    context = oracle.prompt_context
+    for _ in range(prompts_per_resolve):
+        f"### Inputs\n{context}\n"
+
+
+def storage_reads(resolve) -> int:
+    oracle = CountedStorage(market)
+    resolve(oracle)
+    return oracle.reads
+
+
+def main() -> None:
+    runs = 20000
+    oracle = Storage(market)
+    before = timeit.timeit(lambda: per_resolve_rendering(oracle), number=runs) / runs
+    after = timeit.timeit(lambda: prerendered_context(oracle), number=runs) / runs
+    reads_before = storage_reads(per_resolve_rendering)
+    reads_after = storage_reads(prerendered_context)
+
+    print(
+        f"per-resolve rendering: {before * 1e6:.2f} us, "
+        f"{reads_before} storage reads for the prompt inputs"
+    )
+    print(
+        f"pre-rendered context:  {after * 1e6:.2f} us, "
+        f"{reads_after} storage read for the prompt inputs"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import json
+from pathlib import Path
+import pytest
+from tools.contract import load_contract_helpers
+
+helpers = load_contract_helpers()
+corpus = json.loads((Path(__file__).parent / "fixtures/llm_outputs.json").read_text())
+
+
+@pytest.mark.parametrize("sample", corpus, ids=[sample["name"] for sample in corpus])
+def test_parse_json_dict_llm_outputs(sample):
+    # Malformed outputs must be rejected, not replaced by an object nested inside them
+    if sample["expected"] is None:
+        with pytest.raises(helpers["LLMOutputError"]):
+            helpers["_parse_json_dict"](sample["output"])
+    else:
+        assert helpers["_parse_json_dict"](sample["output"]) == sample["expected"]
+
+
+def test_parse_json_dict_without_object():
+    with pytest.raises(helpers["LLMOutputError"]):
+        helpers["_parse_json_dict"]("I could not determine the outcome.")
@@ -0,0 +1,491 @@
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from tools.contract import load_contract_helpers
+
+helpers = load_contract_helpers()
+
+
+def test_compact_webpage_drops_boilerplate_and_repeated_lines():
+    repeated = "Scores are updated every five minutes"
+    text = "\n".join(
+        [
+            "Match report",
+            "",
+            "We use cookies to improve your experience",
+            f"  {repeated}  ",
+            "Spain   2 - 1   Italy",
+            repeated,
+            "ok",
+            "ok",
+            "© 2024 All rights reserved",
+        ]
+    )
+    compacted, report = helpers["_compact_webpage"](text, 0)
+    assert compacted == f"Match report\n{repeated}\nSpain 2 - 1 Italy\nok\nok"
+    assert report == {
+        "original_chars": len(text),
+        "compacted_chars": len(compacted),
+        "boilerplate_lines": 2,
+        "repeated_lines": 1,
+        "truncated_chars": 0,
+    }
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "Arsenal sign in-form striker",
+        "Manager expected to resign in the summer",
+        "Player consented to the transfer",
+        "design in question",
+        "Subscribers saw Spain beat Italy 2-1",
+        "Privacy row overshadows the final",
+    ],
+)
+def test_compact_webpage_keeps_news_lines_with_boilerplate_words(line):
+    compacted, report = helpers["_compact_webpage"](f"Sign in\n{line}\nSubscribe", 0)
+    assert compacted == line
+    assert report["boilerplate_lines"] == 2
+
+
+def test_compact_webpage_keeps_long_lines_with_boilerplate_keywords():
+    line = "The privacy policy dispute " + "x" * 120
+    compacted, report = helpers["_compact_webpage"](line, 0)
+    assert compacted == line
+    assert report["boilerplate_lines"] == 0
+
+
+def test_compact_webpage_truncates_at_line_boundary():
+    text = "first line\nsecond line\nthird line"
+    compacted, report = helpers["_compact_webpage"](text, 25)
+    assert compacted == "first line\nsecond line"
+    assert report["truncated_chars"] == len(text) - len(compacted)
+    compacted, report = helpers["_compact_webpage"]("a" * 50, 10)
+    assert compacted == "a" * 10
+    assert report["truncated_chars"] == 40
+
+
+PAGE = "\n".join(f"line {number}" for number in range(1, 101))
+
+
+def test_apply_extraction_hint_lines():
+    assert helpers["_apply_extraction_hint"](PAGE, "lines:3-5") == (
+        "line 3\nline 4\nline 5"
+    )
+    assert helpers["_apply_extraction_hint"](PAGE, "lines:200-300") == PAGE
+
+
+def test_apply_extraction_hint_anchor():
+    selected = helpers["_apply_extraction_hint"](PAGE, "anchor:LINE 10")
+    lines = selected.splitlines()
+    assert lines[0] == "line 10"
+    assert len(lines) == helpers["EXTRACTION_HINT_ANCHOR_LINES"]
+    assert helpers["_apply_extraction_hint"](PAGE, "anchor:missing") == PAGE
+
+
+def test_apply_extraction_hint_keyword():
+    text = "\n".join(["final score"] + ["filler"] * 20 + ["Final Score: 2-1"])
+    context = helpers["EXTRACTION_HINT_CONTEXT_LINES"]
+    selected = helpers["_apply_extraction_hint"](text, "keyword:final score")
+    assert selected.splitlines() == (
+        ["final score"] + ["filler"] * (2 * context) + ["Final Score: 2-1"]
+    )
+
+
+def test_apply_extraction_hint_without_hint():
+    assert helpers["_apply_extraction_hint"](PAGE, "") == PAGE
+
+
+@pytest.mark.parametrize(
+    "hint", ["anchor", "anchor:", "lines:5-3", "lines:0-3", "lines:a-b", "regex:x"]
+)
+def test_apply_extraction_hint_rejects_invalid_hints(hint):
+    with pytest.raises(ValueError):
+        helpers["_apply_extraction_hint"](PAGE, hint)
+
+
+STRUCTURED_RULE = {
+    "json_path": "matches.0.winner",
+    "outcome_map": {"HOME": "Spain Wins", "AWAY": "Italy Wins", "1": "Draw"},
+}
+
+
+def test_apply_structured_rule_maps_value():
+    page = json.dumps({"matches": [{"winner": "HOME"}]})
+    result = helpers["_apply_structured_rule"](page, STRUCTURED_RULE)
+    assert result["outcome"] == "Spain Wins"
+    assert result["event_has_occurred"] == "true"
+
+
+@pytest.mark.parametrize(
+    "page",
+    [
+        json.dumps({"matches": []}),
+        json.dumps({"matches": [{"score": "1-0"}]}),
+        json.dumps({"matches": {"winner": "HOME"}}),
+        json.dumps(["HOME"]),
+        "<html>Not JSON</html>",
+    ],
+)
+def test_apply_structured_rule_missing_path(page):
+    result = helpers["_apply_structured_rule"](page, STRUCTURED_RULE)
+    assert result["outcome"] == "UNDETERMINED"
+    assert result["valid_source"] == "false"
+
+
+def test_apply_structured_rule_unmapped_value():
+    page = json.dumps({"matches": [{"winner": "ABANDONED"}]})
+    result = helpers["_apply_structured_rule"](page, STRUCTURED_RULE)
+    assert result["outcome"] == "UNDETERMINED"
+    assert result["valid_source"] == "true"
+    assert result["event_has_occurred"] == "false"
+
+
+def test_apply_structured_rule_numeric_value():
+    # Non-string values are looked up by their JSON encoding
+    page = json.dumps({"matches": [{"winner": 1}]})
+    result = helpers["_apply_structured_rule"](page, STRUCTURED_RULE)
+    assert result["outcome"] == "Draw"
+    page = json.dumps({"matches": [{"winner": 1.0}]})
+    result = helpers["_apply_structured_rule"](page, STRUCTURED_RULE)
+    assert result["outcome"] == "UNDETERMINED"
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("bbc.com", "bbc.com"),
+        ("  BBC.com  ", "bbc.com"),
+        ("www.bbc.com", "bbc.com"),
+        ("bbc.com.", "bbc.com"),
+        ("https://www.bbc.com:443/sport/football?x=1", "bbc.com"),
+        ("sport.bbc.co.uk/results", "sport.bbc.co.uk"),
+        ("", ""),
+        ("https://", ""),
+        ("bbc..com", ""),
+    ],
+)
+def test_normalize_domain(value, expected):
+    assert helpers["_normalize_domain"](value) == expected
+
+
+@pytest.mark.parametrize(
+    "domain, evidence_domain, allowed",
+    [
+        ("bbc.com", "bbc.com", True),
+        ("bbc.com", "sport.bbc.com", True),
+        ("bbc.com", "live.sport.bbc.com", True),
+        ("bbc.com", "notbbc.com", False),
+        ("bbc.com", "bbc.com.evil.net", False),
+        ("sport.bbc.com", "bbc.com", False),
+    ],
+)
+def test_domain_lookup_keys_match_subdomains(domain, evidence_domain, allowed):
+    domain_index = {helpers["_domain_index_key"](domain)}
+    lookup_keys = helpers["_domain_lookup_keys"](evidence_domain)
+    assert any(key in domain_index for key in lookup_keys) == allowed
+
+
+def test_domain_lookup_keys():
+    assert helpers["_domain_lookup_keys"]("sport.bbc.com") == [
+        "com",
+        "com.bbc",
+        "com.bbc.sport",
+    ]
+
+
+def test_domain_index_key_reverses_labels():
+    assert helpers["_domain_index_key"]("sport.bbc.com") == "com.bbc.sport"
+
+
+NOW = datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+
+
+def test_next_resolution_check_earliest_future_completion():
+    outputs = [
+        ("a", {"event_has_occurred": "false", "expected_completion": "2024-06-03"}),
+        (
+            "b",
+            {
+                "event_has_occurred": "false",
+                "expected_completion": "2024-06-02T18:00:00+00:00",
+            },
+        ),
+        ("c", {"event_has_occurred": "false", "expected_completion": "2024-05-30"}),
+        ("d", {"event_has_occurred": "false", "expected_completion": "soon"}),
+        ("e", {"event_has_occurred": "false"}),
+    ]
+    assert helpers["_next_resolution_check"](outputs, NOW) == (
+        "2024-06-02T18:00:00+00:00"
+    )
+
+
+def test_next_resolution_check_is_capped():
+    outputs = [
+        ("a", {"event_has_occurred": "false", "expected_completion": "2025-01-01"})
+    ]
+    expected = NOW + helpers["MAX_NEXT_RESOLUTION_CHECK_DELAY"]
+    assert helpers["_next_resolution_check"](outputs, NOW) == expected.isoformat()
+
+
+@pytest.mark.parametrize(
+    "outputs",
+    [
+        [],
+        [("a", {"event_has_occurred": "false", "expected_completion": ""})],
+        [
+            ("a", {"event_has_occurred": "false", "expected_completion": "2024-06-03"}),
+            ("b", {"event_has_occurred": " True "}),
+        ],
+    ],
+)
+def test_next_resolution_check_without_hint(outputs):
+    assert helpers["_next_resolution_check"](outputs, NOW) == ""
+
+
+def test_next_resolution_check_naive_times_are_utc():
+    outputs = [
+        (
+            "a",
+            {
+                "event_has_occurred": "false",
+                "expected_completion": "2024-06-01T13:00:00",
+            },
+        )
+    ]
+    expected = NOW + timedelta(hours=1)
+    assert helpers["_next_resolution_check"](outputs, NOW) == expected.isoformat()
+
+
+def outcome_index(outcomes, aliases=None):
+    return helpers["_build_outcome_index"](outcomes, aliases or {})
+
+
+@pytest.mark.parametrize(
+    "outcome, expected",
+    [
+        ("Bayern Munich", "bayern munich"),
+        ('"Bayern  Munich"', "bayern munich"),
+        ("`Atlético Madrid`", "atletico madrid"),
+        ("<50%", "<50%"),
+        ("Team A.", "team a."),
+    ],
+)
+def test_outcome_key(outcome, expected):
+    assert helpers["_outcome_key"](outcome) == expected
+
+
+def test_canonical_outcome_folds_case_accents_and_quotes():
+    index = outcome_index(["Atlético Madrid", "Real Madrid", "Draw"])
+    canonical = helpers["_canonical_outcome"]
+    assert canonical("atletico madrid", index) == "Atlético Madrid"
+    assert canonical("'REAL  MADRID'", index) == "Real Madrid"
+    assert canonical("undetermined", index) == "UNDETERMINED"
+    assert canonical(" Barcelona ", index) == "Barcelona"
+
+
+@pytest.mark.parametrize("outcomes", [["<50%", ">50%"], ["+", "-"], ["A.", "A"]])
+def test_canonical_outcome_keeps_punctuation_apart(outcomes):
+    index = outcome_index(outcomes)
+    assert [helpers["_canonical_outcome"](o, index) for o in outcomes] == outcomes
+
+
+def test_canonical_outcome_falls_back_to_exact_matching_on_collisions():
+    index = outcome_index(["Yes", "YES", "No"])
+    canonical = helpers["_canonical_outcome"]
+    assert index[helpers["_outcome_key"]("yes")] == ""
+    assert canonical("Yes", index) == "Yes"
+    assert canonical(" YES ", index) == "YES"
+    assert canonical("yes", index) == "yes"
+    assert canonical("no", index) == "No"
+
+
+def test_build_outcome_index_with_aliases():
+    index = outcome_index(
+        ["Spain Wins", "Italy Wins", "Draw"], {"Spain Wins": ["Spain", "ESP"]}
+    )
+    assert helpers["_canonical_outcome"]("spain", index) == "Spain Wins"
+    assert helpers["_canonical_outcome"]("Esp", index) == "Spain Wins"
+    assert helpers["_canonical_outcome"]("Italy", index) == "Italy"
+
+
+@pytest.mark.parametrize(
+    "aliases, error",
+    [
+        ({"Portugal Wins": ["Portugal"]}, "Aliases given for unknown outcome"),
+        ({"Spain Wins": ["Italy Wins"]}, "Ambiguous or empty outcome alias"),
+        ({"Spain Wins": ["Tie"], "Draw": ["tie"]}, "Ambiguous or empty outcome alias"),
+        ({"Draw": ["Undetermined"]}, "Ambiguous or empty outcome alias"),
+        ({"Draw": ["error"]}, "Ambiguous or empty outcome alias"),
+        ({"Draw": ["  "]}, "Ambiguous or empty outcome alias"),
+    ],
+)
+def test_build_outcome_index_rejects_invalid_aliases(aliases, error):
+    with pytest.raises(ValueError, match=error):
+        outcome_index(["Spain Wins", "Italy Wins", "Draw"], aliases)
+
+
+def test_build_outcome_index_rejects_aliases_of_colliding_outcomes():
+    # "yes" maps to "" for exact matching, an alias cannot claim it
+    with pytest.raises(ValueError, match="Ambiguous or empty outcome alias"):
+        outcome_index(["Yes", "YES", "No"], {"Yes": ["yes"]})
+
+
+OUTCOMES = ["Spain Wins", "Italy Wins", "Draw"]
+
+
+def sources(*outcomes):
+    return [
+        (f"https://s{index}.com", {"outcome": o}) for index, o in enumerate(outcomes)
+    ]
+
+
+@pytest.mark.parametrize("outcome", ["Spain Wins", "UNDETERMINED", "ERROR"])
+def test_agreed_outcome_takes_a_single_source_as_is(outcome):
+    assert helpers["_agreed_outcome"](sources(outcome), OUTCOMES) == outcome
+
+
+@pytest.mark.parametrize(
+    "outputs, expected",
+    [
+        (sources("Draw", "Draw", "Draw"), "Draw"),
+        (sources("Draw", "Spain Wins"), None),
+        (sources("UNDETERMINED", "UNDETERMINED"), None),
+        (sources("ERROR", "ERROR"), None),
+        (sources(None), None),
+        ([], None),
+    ],
+)
+def test_agreed_outcome(outputs, expected):
+    assert helpers["_agreed_outcome"](outputs, OUTCOMES) == expected
+
+
+def test_split_into_chunks_at_line_boundaries():
+    assert helpers["_split_into_chunks"]("aa\nbb\ncc\ndd", 5) == ["aa\nbb", "cc\ndd"]
+
+
+def test_split_into_chunks_cuts_long_lines():
+    chunks = helpers["_split_into_chunks"]("aa\n" + "b" * 12 + "\ncc", 5)
+    assert chunks == ["aa", "bbbbb", "bbbbb", "bb\ncc"]
+    assert all(len(chunk) <= 5 for chunk in chunks)
+
+
+def test_split_into_chunks_keeps_all_lines():
+    text = "\n".join(f"line {number}" for number in range(50))
+    chunks = helpers["_split_into_chunks"](text, 40)
+    assert "\n".join(chunks) == text
+    assert all(len(chunk) <= 40 for chunk in chunks)
+
+
+def test_split_into_chunks_of_empty_text():
+    assert helpers["_split_into_chunks"]("", 5) == []
+
+
+def test_normalize_verdict_keeps_only_compared_fields():
+    index = {"draw": "Draw", "undetermined": "UNDETERMINED"}
+    verdict = helpers["_normalize_verdict"](
+        {
+            "outcome": " 'draw' ",
+            "valid_source": "Yes",
+            "event_has_occurred": True,
+            "reasoning": "The match ended 1-1.",
+            "content_hash": "abc",
+        },
+        index,
+    )
+    assert verdict == {
+        "outcome": "Draw",
+        "valid_source": "true",
+        "event_has_occurred": "true",
+    }
+
+
+@pytest.mark.parametrize("flag", ["false", "no", "0", "", None, "maybe"])
+def test_normalize_verdict_other_flags_are_false(flag):
+    verdict = helpers["_normalize_verdict"]({"outcome": "X", "valid_source": flag}, {})
+    assert verdict == {"outcome": "X", "valid_source": "false"}
+
+
+def test_normalize_verdict_without_outcome():
+    assert helpers["_normalize_verdict"]({}, {}) == {"outcome": ""}
+
+
+@pytest.mark.parametrize(
+    "outputs, expected",
+    [
+        (sources("Draw", "Spain Wins", "Draw"), ("Draw", 2)),
+        (sources("Italy Wins", "Spain Wins"), ("Spain Wins", 1)),
+        (sources("UNDETERMINED", "ERROR", "Draw"), ("Draw", 1)),
+        (sources("UNDETERMINED", "UNDETERMINED"), ("Spain Wins", 0)),
+        ([], ("Spain Wins", 0)),
+    ],
+)
+def test_leading_outcome(outputs, expected):
+    assert helpers["_leading_outcome"](outputs, OUTCOMES) == expected
+
+
+def evidence_urls(count):
+    return [f"https://www.bbc.com/sport/{index}" for index in range(count)]
+
+
+@pytest.mark.parametrize(
+    "urls, has_resolution_urls, rejection",
+    [
+        (evidence_urls(1), True, "UNEXPECTED_EVIDENCE_URL"),
+        ([], True, None),
+        ([], False, "MISSING_EVIDENCE_URL"),
+        (evidence_urls(1), False, None),
+        (evidence_urls(helpers["MAX_EVIDENCE_URLS"]), False, None),
+        (
+            evidence_urls(helpers["MAX_EVIDENCE_URLS"] + 1),
+            False,
+            "TOO_MANY_EVIDENCE_URLS",
+        ),
+    ],
+)
+def test_evidence_rejection(urls, has_resolution_urls, rejection):
+    result = helpers["_evidence_rejection"](urls, has_resolution_urls)
+    assert (result.name if result else None) == rejection
+
+
+def test_evidence_limit_counts_distinct_urls():
+    urls = helpers["_evidence_list"](*evidence_urls(1) * 10)
+    assert helpers["_evidence_rejection"](urls, False) is None
+
+
+@pytest.mark.parametrize(
+    "analysis",
+    [
+        {
+            "relevant_sources": ["https://a.com"],
+            "reasoning": "Both sources agree.",
+            "outcome": "Draw",
+        },
+        {
+            "sources": [
+                {"source_url": "https://a.com", "outcome": "Draw", "reasoning": "1-1"},
+                {"source_url": "https://b.com", "outcome": "Draw", "reasoning": ""},
+            ],
+            "relevant_sources": ["https://a.com", "https://b.com"],
+            "reasoning": "Both sources report a draw.",
+            "outcome": "Draw",
+        },
+        {"outcome": "UNDETERMINED", "reasoning": ""},
+    ],
+)
+def test_split_and_join_reasoning_round_trip(analysis):
+    summary, reasoning = helpers["_split_reasoning"](analysis)
+    assert "reasoning" not in json.dumps(summary)
+    stored = json.loads(json.dumps(summary)), json.loads(json.dumps(reasoning))
+    joined = helpers["_join_reasoning"](*stored)
+    assert joined == analysis
+    assert list(joined)[-1] == "reasoning"
+
+
+def test_split_reasoning_keeps_malformed_sources_in_the_summary():
+    analysis = {"sources": "none", "reasoning": "No sources.", "outcome": "ERROR"}
+    summary, reasoning = helpers["_split_reasoning"](analysis)
+    assert summary == {"sources": "none", "outcome": "ERROR"}
+    assert reasoning == {"reasoning": "No sources."}
+    assert helpers["_join_reasoning"](summary, reasoning) == analysis
@@ -0,0 +1,128 @@
+import ast
+import pytest
+from tools.contract import CONTRACTS_DIR, load_contract_helpers
+
+helpers = load_contract_helpers("IntelligentOracleFactory.py")
+oracle_helpers = load_contract_helpers()
+oracle_source = (CONTRACTS_DIR / "IntelligentOracle.py").read_text()
+
+
+def oracle_constructor() -> ast.FunctionDef:
+    module = ast.parse(oracle_source)
+    oracle = next(
+        node
+        for node in module.body
+        if isinstance(node, ast.ClassDef) and node.name == "IntelligentOracle"
+    )
+    return next(
+        node
+        for node in oracle.body
+        if isinstance(node, ast.FunctionDef) and node.name == "__init__"
+    )
+
+
+MARKET = {
+    "prediction_market_id": "PM_001",
+    "title": "Spain vs Italy",
+    "description": "Predict the match outcome",
+    "potential_outcomes": ["Spain Wins", "Italy Wins", "Draw"],
+    "rules": ["Result based on official score"],
+    "data_source_domains": [],
+    "resolution_urls": ["https://example.com/results"],
+    "earliest_resolution_date": "2024-06-21",
+}
+
+
+def test_oracle_args_orders_and_fills_defaults():
+    args = helpers["_oracle_args"]({**dict(reversed(MARKET.items())), "quorum": 2})
+    names = [name for name, _ in helpers["ORACLE_PARAMETERS"]]
+    assert len(args) == len(names)
+    assert args[:8] == list(MARKET.values())
+    assert dict(zip(names, args))["quorum"] == 2
+    assert dict(zip(names, args))["evaluation_mode"] == "per_source"
+
+
+@pytest.mark.parametrize(
+    "changes, error",
+    [
+        ({"winner": "Spain"}, "Unknown market parameter"),
+        ({"title": None}, "Missing market parameter: title"),
+        ({"title": ""}, "Missing required fields."),
+        ({"rules": []}, "Missing required fields."),
+        ({"resolution_urls": []}, "Missing resolution URLs or data source domains."),
+        (
+            {"data_source_domains": ["bbc.com"]},
+            "Cannot provide both resolution URLs and data source domains.",
+        ),
+        (
+            {"potential_outcomes": ["Spain Wins"]},
+            "At least two potential outcomes are required.",
+        ),
+        (
+            {"potential_outcomes": ["Draw", "Draw"]},
+            "Potential outcomes must be unique.",
+        ),
+    ],
+)
+def test_oracle_args_rejects_invalid_specs(changes, error):
+    spec = {**MARKET, **changes}
+    spec = {name: value for name, value in spec.items() if value is not None}
+    with pytest.raises(ValueError, match=error):
+        helpers["_oracle_args"](spec)
+
+
+@pytest.mark.parametrize(
+    "offset, limit, size, expected",
+    [
+        (0, 10, 5, range(0, 5)),
+        (2, 2, 5, range(2, 4)),
+        (5, 10, 5, range(5, 5)),
+        (10, 10, 5, range(5, 5)),
+        (0, 1000, 500, range(0, 100)),
+        (0, 0, 5, range(0, 0)),
+    ],
+)
+def test_page(offset, limit, size, expected):
+    assert list(helpers["_page"](offset, limit, size)) == list(expected)
+
+
+def test_page_clamps_negative_bounds():
+    assert list(helpers["_page"](-3, 2, 5)) == [0, 1]
+    assert list(helpers["_page"](1, -1, 5)) == []
+
+
+def test_oracle_parameters_match_the_oracle_constructor():
+    arguments = oracle_constructor().args
+    names = [argument.arg for argument in arguments.args[1:]]
+    defaults = [
+        eval(
+            compile(ast.Expression(default), "IntelligentOracle.py", "eval"),
+            oracle_helpers,
+        )
+        for default in arguments.defaults
+    ]
+    defaults = [helpers["REQUIRED"]] * (len(names) - len(defaults)) + defaults
+    assert list(helpers["ORACLE_PARAMETERS"]) == list(zip(names, defaults))
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "Missing required fields.",
+        "Missing resolution URLs or data source domains.",
+        "Cannot provide both resolution URLs and data source domains.",
+        "At least two potential outcomes are required.",
+        "Potential outcomes must be unique.",
+    ],
+)
+def test_oracle_args_checks_are_the_oracle_checks(message):
+    # The Registry only repeats checks that the oracle constructor makes itself
+    raised_messages = [
+        node.exc.args[0].value
+        for node in ast.walk(oracle_constructor())
+        if isinstance(node, ast.Raise)
+        and isinstance(node.exc, ast.Call)
+        and node.exc.args
+        and isinstance(node.exc.args[0], ast.Constant)
+    ]
+    assert message in raised_messages
@@ -0,0 +1,22 @@
+import ast
+from pathlib import Path
+
+CONTRACTS_DIR = Path(__file__).resolve().parents[2] / "intelligent-contracts"
+
+
+def load_contract_helpers(file_name: str = "IntelligentOracle.py") -> dict:
+    """
+    Loads the module-level helpers of a contract (constants, enums and functions)
+    without the GenLayer runtime. The `genlayer` import and the contract classes are left out.
+    """
+    path = CONTRACTS_DIR / file_name
+    module = ast.parse(path.read_text(), filename=str(path))
+    module.body = [
+        node
+        for node in module.body
+        if not (isinstance(node, ast.ImportFrom) and node.module == "genlayer")
+        and not (isinstance(node, ast.ClassDef) and node.decorator_list)
+    ]
+    namespace: dict = {}
+    exec(compile(module, str(path), "exec"), namespace)
+    return namespace